@@ -188,9 +188,11 @@ async def list_assets(
 
         
 
-        return AssetList(
+        # 数据库数据可信，直接构造响应模型，跳过逐行字段校验
 
-            items=assets,
+        return AssetList.model_construct(
+
+            items=[AssetSchema.from_orm_fast(asset) for asset in assets],
 
             total=total_count,
 
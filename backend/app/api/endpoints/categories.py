@@ -10,8 +10,8 @@ from app.core.deps import get_db, get_current_active_user
 from app.models.user import User
 from app.crud.category import (
     get_categories as get_categories_crud,
-    get_category_tree,
-    get_category_statistics,
+    get_category_tree as get_category_tree_crud,
+    get_category_statistics as get_category_statistics_crud,
     get_category as get_category_crud,
     create_category,
     update_category,
@@ -63,7 +63,7 @@ async def get_category_tree(
     current_user: User = Depends(get_current_active_user)
 ):
     """获取完整的分类树结构"""
-    return get_category_tree(db=db, user_id=current_user.id)
+    return get_category_tree_crud(db=db, user_id=current_user.id)
 
 
 @router.get("/options", response_model=List[CategoryOption], summary="获取分类选项")
@@ -72,7 +72,7 @@ async def get_category_options(
     current_user: User = Depends(get_current_active_user)
 ):
     """获取用于下拉选择的分类选项列表"""
-    categories = get_category_tree(db=db, user_id=current_user.id)
+    categories = get_category_tree_crud(db=db, user_id=current_user.id)
     
     def flatten_tree(categories_list: List, level: int = 0) -> List[CategoryOption]:
         options = []
@@ -101,7 +101,7 @@ async def get_category_statistics(
     current_user: User = Depends(get_current_active_user)
 ):
     """获取分类统计信息"""
-    return get_category_statistics(db=db, user_id=current_user.id)
+    return get_category_statistics_crud(db=db, user_id=current_user.id)
 
 
 @router.get("/{category_id}", response_model=CategorySchema, summary="获取分类详情")
@@ -84,14 +84,14 @@ def read_documents(
     """
     获取文档列表
     """
-    documents = crud_document.get_multi(
+    documents, total_count = crud_document.list_and_count(
         db, skip=skip, limit=limit, 
         category_id=category_id, status=status
     )
-    total_count = crud_document.count(db, category_id=category_id, status=status)
     
-    return DocumentList(
-        items=documents,
+    # 数据库数据可信，直接构造响应模型，跳过逐行字段校验
+    return DocumentList.model_construct(
+        items=[Document.from_orm_fast(doc) for doc in documents],
         total=total_count,
         page=skip // limit + 1 if limit > 0 else 1,
         per_page=limit,
@@ -225,6 +225,7 @@ def delete_document(
         "document_id": document_id,
         "document_title": delete_result["document"]["title"],
         "file_deleted": delete_result["file_deleted"],
+        "file_shared": delete_result["file_shared"],  # 文件仍被其他文档引用而保留在磁盘上
         "document_deleted": delete_result["document_deleted"]
     }
     
@@ -392,7 +393,7 @@ def search_documents(
     搜索文档
     """
     documents = crud_document.search(db=db, query=query, skip=skip, limit=limit)
-    return documents
+    return [Document.from_orm_fast(doc) for doc in documents]
 
 
 @router.get("/popular/", response_model=List[Document], summary="获取热门文档")
@@ -404,7 +405,7 @@ def read_popular_documents(
     获取热门文档列表
     """
     documents = crud_document.get_popular(db=db, limit=limit)
-    return documents
+    return [Document.from_orm_fast(doc) for doc in documents]
 
 
 # 分类相关接口
@@ -418,7 +419,7 @@ def read_categories(
     获取分类列表
     """
     categories = crud_document.get_categories(db, skip=skip, limit=limit)
-    return categories
+    return [Category.from_orm_fast(category) for category in categories]
 
 
 @router.post("/categories/", response_model=Category, summary="创建分类")
@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 from app.core.deps import get_db, get_current_active_user
 from app.crud.asset import asset as asset_crud
 from app.models.user import User
-from app.schemas.asset import AssetExtractResult
+from app.schemas.asset import AssetExtractResult, AssetListAdapter
 from app.services.enhanced_asset_extractor import EnhancedAssetExtractor
 
 router = APIRouter()
@@ -101,7 +101,8 @@ async def extract_assets_from_file(
         return AssetExtractResult(
             extracted_count=len(raw_assets),
             merged_count=merged_count,
-            assets=final_assets,
+            # 整批校验新建的资产，复用模块级适配器
+            assets=AssetListAdapter.validate_python(final_assets, from_attributes=True),
             errors=errors
         )
         
@@ -6,15 +6,16 @@
 import time
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from fastapi.security import HTTPBearer
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy import or_, and_
 
 from app.core.deps import get_db, get_current_active_user, get_optional_user
 from app.core.security import (
     create_access_token, verify_password, get_password_hash,
-    create_mobile_tokens, verify_refresh_token, extract_user_id_from_token
+    create_mobile_tokens, verify_refresh_token
 )
 from app.core.config import settings
 from app.crud import user as crud_user, document as crud_document
@@ -25,14 +26,22 @@ from app.schemas.mobile import (
     MobileBaseResponse, MobileAuthResponse, MobileLoginRequest, MobileRefreshTokenRequest,
     MobileUserProfile, MobileDocument, MobileDocumentDetail, MobileDocumentListResponse,
     MobileAsset, MobileAssetDetail, MobileAssetListResponse, MobileSearchRequest,
-    MobileSearchResponse, MobileSearchResult, MobilePaginationInfo, MobileMetaInfo,
-    format_file_size, get_status_display_info, generate_summary
+    MobileSearchResponse, MobileSearchResult,
+    format_file_size, get_status_display_info, generate_summary, build_pagination, build_meta
 )
 
 router = APIRouter()
 security = HTTPBearer()
 
 
+def mobile_json_response(payload: BaseModel) -> Response:
+    """
+    直接序列化已构造好的响应模型并返回，跳过 FastAPI 按 response_model 的再次校验和序列化
+    （response_model 仍保留用于生成接口文档）
+    """
+    return Response(content=payload.model_dump_json(), media_type="application/json")
+
+
 # ============= 认证相关API =============
 
 @router.post("/auth/login", response_model=MobileAuthResponse, summary="移动端用户登录")
@@ -129,8 +138,11 @@ async def mobile_refresh_token(
                 detail="无效的刷新令牌"
             )
         
-        # 提取用户ID
-        user_id = extract_user_id_from_token(refresh_request.refresh_token)
+        # 提取用户ID（直接使用已验证的载荷，避免再次解码令牌）
+        try:
+            user_id = int(payload["sub"]) if payload.get("sub") else None
+        except ValueError:
+            user_id = None
         if not user_id:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -148,7 +160,7 @@ async def mobile_refresh_token(
         # 设备验证（如果提供了设备ID）
         if refresh_request.device_id:
             from app.core.security import validate_device_token
-            if not validate_device_token(refresh_request.refresh_token, refresh_request.device_id):
+            if not validate_device_token(payload, refresh_request.device_id):
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="设备验证失败"
@@ -254,7 +266,7 @@ async def get_mobile_documents(
         # 转换为移动端格式
         mobile_documents = []
         for doc in documents:
-            mobile_doc = MobileDocument(
+            mobile_doc = MobileDocument.model_construct(
                 id=doc.id,
                 title=doc.title,
                 summary=generate_summary(doc.description or doc.content or ""),
@@ -270,25 +282,16 @@ async def get_mobile_documents(
             mobile_documents.append(mobile_doc)
         
         # 构建分页信息
-        pagination = MobilePaginationInfo(
-            page=page,
-            size=size,
-            total=total,
-            has_next=(offset + size) < total,
-            has_prev=page > 1
-        )
+        pagination = build_pagination(page, size, total)
         
         # 构建元信息
-        meta = MobileMetaInfo(
-            response_time=f"{(time.time() - start_time) * 1000:.0f}ms",
-            server_time=datetime.utcnow().isoformat() + "Z"
-        )
+        meta = build_meta(start_time)
         
-        return MobileDocumentListResponse(
+        return mobile_json_response(MobileDocumentListResponse.model_construct(
             data=mobile_documents,
             pagination=pagination,
             meta=meta
-        )
+        ))
         
     except Exception as e:
         raise HTTPException(
@@ -411,10 +414,7 @@ async def search_mobile_documents(
         )
         
         # 构建元信息
-        meta = MobileMetaInfo(
-            response_time=f"{(time.time() - start_time) * 1000:.0f}ms",
-            server_time=datetime.utcnow().isoformat() + "Z"
-        )
+        meta = build_meta(start_time)
         
         return MobileSearchResponse(
             data=search_result,
@@ -477,7 +477,7 @@ async def get_mobile_assets(
         for asset_data in assets:
             status_info = get_status_display_info(asset_data["status"])
             
-            mobile_asset = MobileAsset(
+            mobile_asset = MobileAsset.model_construct(
                 id=asset_data["id"],
                 name=asset_data["name"],
                 asset_type=asset_data["asset_type"],
@@ -496,25 +496,16 @@ async def get_mobile_assets(
         
         # 构建分页信息
         total = len(assets)
-        pagination = MobilePaginationInfo(
-            page=page,
-            size=size,
-            total=total,
-            has_next=False,
-            has_prev=False
-        )
+        pagination = build_pagination(page, size, total)
         
         # 构建元信息
-        meta = MobileMetaInfo(
-            response_time=f"{(time.time() - start_time) * 1000:.0f}ms",
-            server_time=datetime.utcnow().isoformat() + "Z"
-        )
+        meta = build_meta(start_time)
         
-        return MobileAssetListResponse(
+        return mobile_json_response(MobileAssetListResponse.model_construct(
             data=mobile_assets,
             pagination=pagination,
             meta=meta
-        )
+        ))
         
     except Exception as e:
         raise HTTPException(
@@ -13,7 +13,8 @@ from sqlalchemy import or_, and_
 
 from app.core.deps import get_db, get_current_active_user, get_optional_user
 from app.models.user import User
-from app.models.document import Document, SearchLog
+from app.crud import search_log as search_log_crud
+from app.models.document import Document
 from app.services.search_service import SearchService
 from app.services.document_formatter import DocumentFormatter, DocumentType, FormatMode
 from app.core.config import settings
@@ -240,15 +241,14 @@ async def search_documents(
         if current_user:
             response_time = (time.time() - start_time) * 1000  # 转换为毫秒
             
-            search_log = SearchLog(
+            search_log_crud.record_search(
+                db,
                 user_id=current_user.id,
                 query=q,
                 results_count=total,
                 response_time=response_time,
                 filters={"doc_type": doc_type, "limit": limit, "offset": offset}
             )
-            db.add(search_log)
-            db.commit()
         
         return {
             "query": q,
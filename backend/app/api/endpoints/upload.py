@@ -9,6 +9,7 @@ from app.core.config import settings
 from app.core.deps import get_db, get_current_active_user, get_optional_user
 from app.crud import document as crud_document
 from app.crud.asset import asset as asset_crud
+from app.crud.document import compute_content_hash
 from app.models.user import User
 from app.models.asset import AssetStatus, AssetType, NetworkLocation
 from app.schemas.document import Document, DocumentCreate
@@ -303,8 +304,30 @@ async def upload_file(
             detail=f"文件大小超过限制 ({settings.MAX_FILE_SIZE / 1024 / 1024:.1f}MB)"
         )
     
-    # 生成基于标题的安全文件名
+    # 处理标签
+    tag_list = []
+    if tags:
+        tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
+    
+    # 相同内容已上传并完成内容提取时，直接复用文件和提取结果
+    content = await file.read()
+    content_hash = compute_content_hash(content)
+    existing = crud_document.get_reusable_by_content_hash(db, content_hash, current_user.id)
     file_extension = file.filename.rsplit('.', 1)[1].lower()
+    if existing:
+        document_data = DocumentCreate(
+            title=title,
+            description=description,
+            category_id=category_id,
+            tags=tag_list,
+        )
+        return crud_document.create_from_existing(
+            db=db, obj_in=document_data, owner_id=current_user.id, source=existing,
+            file_name=generate_safe_filename(title, file_extension, settings.UPLOAD_DIR),
+            file_type=file_extension, mime_type=file.content_type
+        )
+    
+    # 生成基于标题的安全文件名
     safe_filename = generate_safe_filename(title, file_extension, settings.UPLOAD_DIR)
     file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
     
@@ -335,16 +358,10 @@ async def upload_file(
     # 保存文件
     try:
         with open(file_path, "wb") as buffer:
-            content = await file.read()
             buffer.write(content)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"文件保存失败: {str(e)}")
     
-    # 处理标签
-    tag_list = []
-    if tags:
-        tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-    
     # 创建文档记录
     pass
     
@@ -373,6 +390,7 @@ async def upload_file(
     document.file_size = file_size
     document.file_type = file_extension
     document.mime_type = file.content_type
+    document.content_hash = content_hash
     
     db.commit()
     db.refresh(document)
@@ -497,9 +515,33 @@ async def upload_multiple_files(
             if file_size > settings.MAX_FILE_SIZE:
                 continue  # 跳过过大的文件
             
-            # 生成基于文件名的安全文件名
+            # 处理标签
+            tag_list = []
+            if tags:
+                tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
+            
+            document_data = DocumentCreate(
+                title=file.filename.rsplit('.', 1)[0],  # 使用文件名作为标题
+                description=description,
+                category_id=category_id,
+                tags=tag_list,
+            )
+            
+            # 相同内容已上传并完成内容提取时，直接复用文件和提取结果
+            content = await file.read()
+            content_hash = compute_content_hash(content)
+            existing = crud_document.get_reusable_by_content_hash(db, content_hash, current_user.id)
             file_extension = file.filename.rsplit('.', 1)[1].lower()
             file_title = file.filename.rsplit('.', 1)[0]  # 使用原文件名作为标题
+            if existing:
+                uploaded_documents.append(crud_document.create_from_existing(
+                    db=db, obj_in=document_data, owner_id=current_user.id, source=existing,
+                    file_name=generate_safe_filename(file_title, file_extension, settings.UPLOAD_DIR),
+                    file_type=file_extension, mime_type=file.content_type
+                ))
+                continue
+            
+            # 生成基于文件名的安全文件名
             safe_filename = generate_safe_filename(file_title, file_extension, settings.UPLOAD_DIR)
             file_path = os.path.join(settings.UPLOAD_DIR, safe_filename)
             
@@ -526,22 +568,9 @@ async def upload_multiple_files(
                     break
             
             with open(file_path, "wb") as buffer:
-                content = await file.read()
                 buffer.write(content)
             
-            # 处理标签
-            tag_list = []
-            if tags:
-                tag_list = [tag.strip() for tag in tags.split(',') if tag.strip()]
-            
             # 创建文档记录
-            document_data = DocumentCreate(
-                title=file.filename.rsplit('.', 1)[0],  # 使用文件名作为标题
-                description=description,
-                category_id=category_id,
-                tags=tag_list,
-            )
-            
             document = crud_document.create(db=db, obj_in=document_data, owner_id=current_user.id)
             
             # 更新文件信息
@@ -550,6 +579,7 @@ async def upload_multiple_files(
             document.file_size = file_size
             document.file_type = file_extension
             document.mime_type = file.content_type
+            document.content_hash = content_hash
             
             db.commit()
             db.refresh(document)
@@ -17,7 +17,7 @@ from app.models.document import Document
 from app.models.asset import Asset
 from app.schemas.voice import (
     VoiceQueryRequest, VoiceQueryResponse, VoiceParseRequest, VoiceParseResponse,
-    VoiceSuggestRequest, VoiceSuggestResponse, VoiceQueryResult, 
+    VoiceSuggestRequest, VoiceSuggestResponse, VoiceQueryResult, VoiceStatistics,
     VoiceSearchFilter, VoiceQueryIntent, format_unified_results
 )
 from app.core.nlp_processor import nlp_processor
@@ -81,17 +81,18 @@ async def voice_query(
             filters_applied=search_filter.__dict__ if search_filter else {}
         )
         
-        return VoiceQueryResponse(
+        return VoiceQueryResponse.model_construct(
             success=True,
+            code=200,
             message="语音查询成功",
             data=result,
-            statistics={
-                "documents_found": sum(1 for r in voice_results if r.get("type") == "document"),
-                "assets_found": sum(1 for r in voice_results if r.get("type") == "asset"),
-                "average_relevance": sum(r.get("relevance_score", 0) for r in voice_results) / len(voice_results) if voice_results else 0,
-                "search_coverage": "high" if search_result.total_count >= 10 else "medium" if search_result.total_count >= 5 else "low",
-                "query_complexity": "moderate"
-            },
+            statistics=VoiceStatistics.model_construct(
+                documents_found=sum(1 for r in voice_results if r.get("type") == "document"),
+                assets_found=sum(1 for r in voice_results if r.get("type") == "asset"),
+                average_relevance=sum(r.get("relevance_score", 0) for r in voice_results) / len(voice_results) if voice_results else 0.0,
+                search_coverage="high" if search_result.total_count >= 10 else "medium" if search_result.total_count >= 5 else "low",
+                query_complexity="moderate"
+            ),
             meta={
                 "response_time": response_time,
                 "server_time": datetime.utcnow().isoformat() + "Z",
@@ -121,8 +122,9 @@ async def voice_parse(
     try:
         intent = parse_query_intent(parse_request.query_text)
         
-        return VoiceParseResponse(
+        return VoiceParseResponse.model_construct(
             success=True,
+            code=200,
             message="查询意图解析成功",
             data={
                 "intent": intent,
@@ -165,8 +167,9 @@ async def voice_suggest(
         # 去重并排序
         unique_suggestions = list(dict.fromkeys(suggestions))[:suggest_request.limit]
         
-        return VoiceSuggestResponse(
+        return VoiceSuggestResponse.model_construct(
             success=True,
+            code=200,
             message="查询建议生成成功",
             data={
                 "suggestions": unique_suggestions,
@@ -146,6 +146,12 @@ def invalidate_document_cache(document_id: int):
     for key in keys_to_delete:
         cache.delete(key)
 
+def invalidate_category_cache():
+    """使分类列表缓存失效"""
+    keys_to_delete = [key for key in cache.cache.keys() if key.startswith("categories:")]
+    for key in keys_to_delete:
+        cache.delete(key)
+
 class CacheWarmer:
     """缓存预热器"""
     
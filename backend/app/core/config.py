@@ -25,6 +25,8 @@ class Settings(BaseSettings):
     # 使用绝对路径，确保数据库文件在backend目录下
     DATABASE_URL: str = f"sqlite:///{os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'yunwei_docs.db'))}"
     TEST_DATABASE_URL: Optional[str] = None
+    # 启动时自动创建缺失的数据表（由外部迁移工具管理表结构时可关闭）
+    AUTO_CREATE_TABLES: bool = True
     
     # 安全配置
     SECRET_KEY: str = "REQUIRED_SET_IN_ENV_FILE"
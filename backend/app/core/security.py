@@ -1,12 +1,66 @@
 from datetime import datetime, timedelta
 from typing import Optional, Union, Dict, Any
-from jose import JWTError, jwt
+import bcrypt
+import hmac
+import jwt
+from jwt import InvalidTokenError as JWTError
+from jwt.algorithms import HMACAlgorithm
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 from app.core.config import settings
-import uuid
+import secrets
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+# 签名密钥在进程启动时编码一次，编码/解码时直接复用
+_SIGNING_KEY = settings.SECRET_KEY.encode("utf-8")
+
+_HMAC_HASH_ALGS = {
+    "HS256": HMACAlgorithm.SHA256,
+    "HS384": HMACAlgorithm.SHA384,
+    "HS512": HMACAlgorithm.SHA512,
+}
+
+
+class _PrecomputedHMACAlgorithm(HMACAlgorithm):
+    """预先派生HMAC上下文的签名算法，每个令牌只需复制原型并更新消息"""
+
+    def __init__(self, hash_alg, key: bytes):
+        super().__init__(hash_alg)
+        self._key = self.prepare_key(key)
+        self._proto = hmac.new(self._key, digestmod=hash_alg)
+
+    def prepare_key(self, key):
+        if getattr(self, "_key", None) is not None and key is self._key:
+            return self._key
+        return super().prepare_key(key)
+
+    def sign(self, msg: bytes, key: bytes) -> bytes:
+        if key is self._key:
+            h = self._proto.copy()
+            h.update(msg)
+            return h.digest()
+        return super().sign(msg, key)
+
+    def verify(self, msg: bytes, key: bytes, sig: bytes) -> bool:
+        return hmac.compare_digest(sig, self.sign(msg, key))
+
+
+if settings.ALGORITHM in _HMAC_HASH_ALGS:
+    jwt.unregister_algorithm(settings.ALGORITHM)
+    jwt.register_algorithm(
+        settings.ALGORITHM,
+        _PrecomputedHMACAlgorithm(_HMAC_HASH_ALGS[settings.ALGORITHM], _SIGNING_KEY)
+    )
+
+
+def _decode_token(token: str) -> Dict[str, Any]:
+    """解码并校验令牌，所有解码入口共用同一组校验选项"""
+    return jwt.decode(
+        token, _SIGNING_KEY, algorithms=[settings.ALGORITHM],
+        options={"require": ["exp", "sub"]}
+    )
 
 
 def create_access_token(
@@ -49,7 +103,7 @@ def create_access_token(
         "exp": expire,
         "iat": datetime.utcnow(),
         "type": token_type,
-        "jti": str(uuid.uuid4())  # JWT ID，用于令牌管理
+        "jti": secrets.token_hex(16)  # JWT ID，用于令牌管理
     })
     
     # 添加设备绑定
@@ -60,15 +114,19 @@ def create_access_token(
     if additional_claims:
         to_encode.update(additional_claims)
     
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, _SIGNING_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
 def verify_token(token: str) -> dict:
     """验证JWT令牌 - 安全版本，移除危险的Base64绕过"""
     try:
-        # 只接受标准JWT格式的令牌
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        # 只接受标准JWT格式的令牌：头部必须以 {" 的base64编码开头且恰好包含三段，
+        # 不符合的令牌直接拒绝，不再进入签名校验
+        if not token.startswith("eyJ") or token.count(".") != 2:
+            raise jwt.DecodeError("非JWT格式的令牌")
+        
+        payload = _decode_token(token)
         
         # 验证必要的声明
         if "exp" not in payload:
@@ -95,22 +153,25 @@ def verify_token(token: str) -> dict:
             detail="令牌已过期",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    except jwt.InvalidTokenError:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="无效的认证凭据",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="认证凭据验证失败",
+            detail="无效的认证凭据",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """验证密码"""
+    # 已知的bcrypt哈希直接交给bcrypt校验，跳过passlib的方案识别；其余格式仍走passlib。
+    # bcrypt只使用前72字节，与passlib的截断行为保持一致
+    if hashed_password and hashed_password.startswith(_BCRYPT_PREFIXES):
+        try:
+            return bcrypt.checkpw(
+                plain_password.encode("utf-8")[:72], hashed_password.encode("utf-8")
+            )
+        except ValueError:
+            pass
     return pwd_context.verify(plain_password, hashed_password)
 
 
@@ -127,7 +188,7 @@ def generate_password_reset_token(email: str) -> str:
     exp = expires.timestamp()
     encoded_jwt = jwt.encode(
         {"exp": exp, "nbf": now, "sub": email}, 
-        settings.SECRET_KEY, 
+        _SIGNING_KEY, 
         algorithm=settings.ALGORITHM
     )
     return encoded_jwt
@@ -136,7 +197,7 @@ def generate_password_reset_token(email: str) -> str:
 def verify_password_reset_token(token: str) -> Optional[str]:
     """验证密码重置令牌"""
     try:
-        decoded_token = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        decoded_token = _decode_token(token)
         return decoded_token["sub"]
     except JWTError:
         return None
@@ -155,7 +216,7 @@ def create_refresh_token(user_id: int, device_id: Optional[str] = None) -> str:
 def verify_refresh_token(refresh_token: str) -> Optional[Dict[str, Any]]:
     """验证刷新令牌"""
     try:
-        payload = jwt.decode(refresh_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _decode_token(refresh_token)
         
         # 检查令牌类型
         if payload.get("type") != "refresh":
@@ -187,25 +248,21 @@ def create_mobile_tokens(user_id: int, device_id: Optional[str] = None) -> Dict[
     }
 
 
-def validate_device_token(token: str, device_id: str) -> bool:
-    """验证令牌是否与指定设备匹配"""
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        token_device_id = payload.get("device_id")
+def validate_device_token(payload: Dict[str, Any], device_id: str) -> bool:
+    """验证已解码的令牌载荷是否与指定设备匹配"""
+    token_device_id = payload.get("device_id")
+    
+    # 如果令牌没有设备绑定，允许通过（向后兼容）
+    if not token_device_id:
+        return True
         
-        # 如果令牌没有设备绑定，允许通过（向后兼容）
-        if not token_device_id:
-            return True
-            
-        return token_device_id == device_id
-    except JWTError:
-        return False
+    return token_device_id == device_id
 
 
 def extract_user_id_from_token(token: str) -> Optional[int]:
     """从令牌中提取用户ID"""
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        payload = _decode_token(token)
         user_id = payload.get("sub")
         return int(user_id) if user_id else None
     except (JWTError, ValueError):
@@ -1,12 +1,18 @@
 # -*- coding: utf-8 -*-
-import json
+import orjson
+from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, or_, func, desc, case, insert
 
-from app.crud.base import CRUDBase
-from app.models.asset import Asset, AssetExtractRule, AssetType, AssetStatus
+from app.core.cache import SimpleMemoryCache
+from app.crud.base import CRUDBase, commit_returning
+from app.models.asset import Asset, AssetExtractRule, AssetType, AssetStatus, asset_search_text
 from app.schemas.asset import AssetCreate, AssetUpdate, AssetSearchQuery
+from app.utils.timezone_utils import get_beijing_now
+
+# 资产提取规则缓存有效期（秒）
+RULES_CACHE_TTL = 60
 
 
 class CRUDAsset(CRUDBase[Asset, AssetCreate, AssetUpdate]):
@@ -29,18 +35,9 @@ class CRUDAsset(CRUDBase[Asset, AssetCreate, AssetUpdate]):
         
         # 基本搜索
         if query.query:
+            # 单个拼接表达式匹配，可命中PostgreSQL上的trigram表达式索引
             search_term = f"%{query.query}%"
-            q = q.filter(
-                or_(
-                    Asset.name.ilike(search_term),
-                    Asset.hostname.ilike(search_term),
-                    Asset.ip_address.ilike(search_term),
-                    Asset.device_model.ilike(search_term),
-                    Asset.service_name.ilike(search_term),
-                    Asset.application.ilike(search_term),
-                    Asset.notes.ilike(search_term)
-                )
-            )
+            q = q.filter(asset_search_text().ilike(search_term))
         
         # 按类型过滤
         if query.asset_type:
@@ -74,48 +71,44 @@ class CRUDAsset(CRUDBase[Asset, AssetCreate, AssetUpdate]):
     
     def get_statistics(self, db: Session) -> Dict[str, Any]:
         """获取资产统计信息"""
-        total_count = db.query(Asset).count()
-        
-        # 按类型统计
+        now = datetime.now()
+        thirty_days_ago = now - timedelta(days=30)
+        
+        # 单次扫描：按四个维度的组合分组，并用条件聚合统计近期新增和待维护数量，
+        # 各维度的汇总在Python端完成（SQLite不支持GROUPING SETS）
+        rows = db.query(
+            Asset.asset_type,
+            Asset.status,
+            Asset.network_location,
+            Asset.department,
+            func.count(Asset.id),
+            func.sum(case((Asset.created_at >= thirty_days_ago, 1), else_=0)),
+            func.sum(case(
+                (and_(Asset.next_maintenance.isnot(None), Asset.next_maintenance <= now), 1),
+                else_=0
+            ))
+        ).group_by(
+            Asset.asset_type, Asset.status, Asset.network_location, Asset.department
+        ).all()
+        
+        total_count = 0
+        recent_additions = 0
+        pending_maintenance = 0
         by_type = {}
-        type_stats = db.query(Asset.asset_type, func.count(Asset.id)).group_by(Asset.asset_type).all()
-        for asset_type, count in type_stats:
-            by_type[asset_type.value] = count
-        
-        # 按状态统计
         by_status = {}
-        status_stats = db.query(Asset.status, func.count(Asset.id)).group_by(Asset.status).all()
-        for status, count in status_stats:
-            by_status[status.value] = count
-        
-        # 按网络位置统计
         by_network_location = {}
-        location_stats = db.query(Asset.network_location, func.count(Asset.id)).filter(
-            Asset.network_location.isnot(None)
-        ).group_by(Asset.network_location).all()
-        for location, count in location_stats:
-            by_network_location[location.value] = count
-        
-        # 按部门统计
         by_department = {}
-        dept_stats = db.query(Asset.department, func.count(Asset.id)).filter(
-            Asset.department.isnot(None)
-        ).group_by(Asset.department).all()
-        for dept, count in dept_stats:
-            by_department[dept] = count
         
-        # 最近30天新增
-        from datetime import datetime, timedelta
-        thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_additions = db.query(Asset).filter(Asset.created_at >= thirty_days_ago).count()
-        
-        # 待维护数量(假设下次维护时间已过期)
-        pending_maintenance = db.query(Asset).filter(
-            and_(
-                Asset.next_maintenance.isnot(None),
-                Asset.next_maintenance <= datetime.now()
-            )
-        ).count()
+        for asset_type, status, location, dept, count, recent, pending in rows:
+            total_count += count
+            recent_additions += recent or 0
+            pending_maintenance += pending or 0
+            by_type[asset_type] = by_type.get(asset_type, 0) + count
+            by_status[status] = by_status.get(status, 0) + count
+            if location is not None:
+                by_network_location[location] = by_network_location.get(location, 0) + count
+            if dept is not None:
+                by_department[dept] = by_department.get(dept, 0) + count
         
         return {
             "total_count": total_count,
@@ -129,109 +122,82 @@ class CRUDAsset(CRUDBase[Asset, AssetCreate, AssetUpdate]):
     
     def create_with_merge_info(self, db: Session, *, obj_in: AssetCreate, creator_id: int, merged_from: List[int] = None) -> Asset:
         """创建资产，包含合并信息"""
-        from datetime import datetime
-        
         obj_data = obj_in.model_dump(exclude_unset=True)
         
         # 处理标签
         if obj_data.get('tags'):
-            obj_data['tags'] = json.dumps(obj_data['tags'])
+            obj_data['tags'] = orjson.dumps(obj_data['tags']).decode()
         else:
             obj_data['tags'] = '[]'
         
         # 处理合并信息
         if merged_from:
             obj_data['is_merged'] = True
-            obj_data['merged_from'] = json.dumps(merged_from)
+            obj_data['merged_from'] = orjson.dumps(merged_from).decode()
         else:
             obj_data['is_merged'] = False
         
         # 设置基本字段
         obj_data['creator_id'] = creator_id
-        from datetime import timezone, timedelta
-        beijing_tz = timezone(timedelta(hours=8))
-        now = datetime.now(beijing_tz)
+        now = get_beijing_now()
         obj_data['created_at'] = now
         obj_data['updated_at'] = now
         
-        db_obj = Asset(**obj_data)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db_obj = db.scalars(insert(Asset).values(**obj_data).returning(Asset)).one()
+        commit_returning(db, db_obj)
         return db_obj
     
     def bulk_create(self, db: Session, *, assets: List[AssetCreate], creator_id: int) -> List[Asset]:
         """批量创建资产"""
-        db_assets = []
+        if not assets:
+            return []
+        
+        # 同一批次共用一个时间戳
+        now = get_beijing_now()
+        rows = []
         for asset_data in assets:
             obj_data = asset_data.model_dump(exclude_unset=True)
             
-            from datetime import datetime
-            
             # 处理标签
             if obj_data.get('tags'):
-                obj_data['tags'] = json.dumps(obj_data['tags'])
+                obj_data['tags'] = orjson.dumps(obj_data['tags']).decode()
             else:
                 obj_data['tags'] = '[]'
             
             # 设置基本字段
             obj_data['creator_id'] = creator_id
-            beijing_tz = timezone(timedelta(hours=8))
-            now = datetime.now(beijing_tz)
             obj_data['created_at'] = now
             obj_data['updated_at'] = now
             obj_data['is_merged'] = False
             
-            db_obj = Asset(**obj_data)
-            db_assets.append(db_obj)
+            rows.append(obj_data)
         
-        db.add_all(db_assets)
+        # 以executemany方式批量插入并返回主键，避免逐行构造ORM对象和refresh
+        new_ids = db.execute(insert(Asset).returning(Asset.id), rows).scalars().all()
         db.commit()
         
-        for db_obj in db_assets:
-            db.refresh(db_obj)
-        
-        return db_assets
+        return db.query(Asset).filter(Asset.id.in_(new_ids)).order_by(Asset.id).all()
     
     def find_similar_assets(self, db: Session, *, asset: AssetCreate, threshold: int = 80) -> List[Asset]:
         """查找相似的资产"""
-        similar_assets = []
-        
-        # 按IP地址查找
+        # 按IP地址、主机名、序列号、MAC地址任一匹配，一次查询完成
+        conditions = []
         if asset.ip_address:
-            ip_matches = db.query(Asset).filter(Asset.ip_address == asset.ip_address).all()
-            similar_assets.extend(ip_matches)
-        
-        # 按主机名查找
+            conditions.append(Asset.ip_address == asset.ip_address)
         if asset.hostname:
-            hostname_matches = db.query(Asset).filter(Asset.hostname == asset.hostname).all()
-            similar_assets.extend(hostname_matches)
-        
-        # 按序列号查找
+            conditions.append(Asset.hostname == asset.hostname)
         if asset.serial_number:
-            serial_matches = db.query(Asset).filter(Asset.serial_number == asset.serial_number).all()
-            similar_assets.extend(serial_matches)
-        
-        # 按MAC地址查找
+            conditions.append(Asset.serial_number == asset.serial_number)
         if asset.mac_address:
-            mac_matches = db.query(Asset).filter(Asset.mac_address == asset.mac_address).all()
-            similar_assets.extend(mac_matches)
+            conditions.append(Asset.mac_address == asset.mac_address)
         
-        # 去重
-        unique_assets = []
-        seen_ids = set()
-        for similar_asset in similar_assets:
-            if similar_asset.id not in seen_ids:
-                unique_assets.append(similar_asset)
-                seen_ids.add(similar_asset.id)
+        if not conditions:
+            return []
         
-        return unique_assets
+        return db.query(Asset).filter(or_(*conditions)).distinct().all()
     
     def merge_assets(self, db: Session, *, source_ids: List[int], target_asset: AssetCreate, creator_id: int) -> Asset:
         """合并多个资产"""
-        # 获取源资产
-        source_assets = db.query(Asset).filter(Asset.id.in_(source_ids)).all()
-        
         # 创建合并后的资产
         merged_asset = self.create_with_merge_info(
             db=db,
@@ -240,10 +206,14 @@ class CRUDAsset(CRUDBase[Asset, AssetCreate, AssetUpdate]):
             merged_from=source_ids
         )
         
-        # 删除源资产或标记为已合并
-        for source_asset in source_assets:
-            source_asset.status = AssetStatus.ARCHIVED
-            source_asset.notes = f"已合并到资产 #{merged_asset.id}"
+        # 源资产标记为已合并，一条UPDATE完成
+        db.query(Asset).filter(Asset.id.in_(source_ids)).update(
+            {
+                Asset.status: AssetStatus.RETIRED.value,
+                Asset.notes: f"已合并到资产 #{merged_asset.id}"
+            },
+            synchronize_session=False
+        )
         
         db.commit()
         return merged_asset
@@ -265,20 +235,47 @@ class CRUDAsset(CRUDBase[Asset, AssetCreate, AssetUpdate]):
 
 class CRUDAssetExtractRule(CRUDBase[AssetExtractRule, Dict, Dict]):
     
+    def __init__(self, model):
+        super().__init__(model)
+        # 规则表读多写少，查询结果在进程内缓存，规则变更时清空
+        self._rules_cache = SimpleMemoryCache(default_ttl=RULES_CACHE_TTL)
+    
+    def _cached_rules(self, db: Session, key: str, build_query) -> List[AssetExtractRule]:
+        rules = self._rules_cache.get(key)
+        if rules is None:
+            rules = build_query().all()
+            # 脱离会话后缓存，避免原会话提交时被过期
+            for rule in rules:
+                db.expunge(rule)
+            self._rules_cache.set(key, rules)
+        return rules
+    
     def get_active_rules(self, db: Session) -> List[AssetExtractRule]:
         """获取所有启用的提取规则"""
-        return db.query(AssetExtractRule).filter(
+        return self._cached_rules(db, "active", lambda: db.query(AssetExtractRule).filter(
             AssetExtractRule.is_active == True
-        ).order_by(AssetExtractRule.priority.desc()).all()
+        ).order_by(AssetExtractRule.priority.desc()))
     
     def get_by_file_type(self, db: Session, *, file_type: str) -> List[AssetExtractRule]:
         """根据文件类型获取提取规则"""
-        return db.query(AssetExtractRule).filter(
+        return self._cached_rules(db, f"file_type:{file_type}", lambda: db.query(AssetExtractRule).filter(
             and_(
                 AssetExtractRule.is_active == True,
                 AssetExtractRule.file_types.ilike(f"%{file_type}%")
             )
-        ).order_by(AssetExtractRule.priority.desc()).all()
+        ).order_by(AssetExtractRule.priority.desc()))
+    
+    def create(self, db: Session, *, obj_in: Dict) -> AssetExtractRule:
+        self._rules_cache.clear()
+        return super().create(db, obj_in=obj_in)
+    
+    def update(self, db: Session, *, db_obj: AssetExtractRule, obj_in: Dict) -> AssetExtractRule:
+        self._rules_cache.clear()
+        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+    
+    def remove(self, db: Session, *, id: int) -> AssetExtractRule:
+        self._rules_cache.clear()
+        return super().remove(db, id=id)
 
 
 # 创建实例
@@ -2,7 +2,9 @@ from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import insert, inspect, update
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.db.database import Base
 
@@ -11,6 +13,31 @@ CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+def commit_returning(db: Session, *objs: Any) -> None:
+    """
+    提交事务，并保留 RETURNING 已取回的列值。
+
+    提交会使会话中的对象过期，下次访问时再 SELECT 一次；这里在提交后把
+    RETURNING 得到的列值写回为已提交状态，返回的对象无需再查询即可使用。
+    其它对象仍按默认方式过期；传入 None 时忽略。
+    """
+    snapshots = []
+    for obj in objs:
+        if obj is None:
+            continue
+        state = inspect(obj)
+        loaded = state.dict
+        snapshots.append((obj, {
+            attr.key: loaded[attr.key]
+            for attr in state.mapper.column_attrs
+            if attr.key in loaded
+        }))
+    db.commit()
+    for obj, values in snapshots:
+        for key, value in values.items():
+            set_committed_value(obj, key, value)
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
     def __init__(self, model: Type[ModelType]):
         """
@@ -24,7 +51,7 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         self.model = model
 
     def get(self, db: Session, id: Any) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+        return db.get(self.model, id)
 
     def get_multi(
         self, db: Session, *, skip: int = 0, limit: int = 100
@@ -33,10 +60,8 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
-        db_obj = self.model(**obj_in_data)  # type: ignore
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db_obj = db.scalars(insert(self.model).values(**obj_in_data).returning(self.model)).one()
+        commit_returning(db, db_obj)
         return db_obj
 
     def update(
@@ -54,21 +79,23 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         else:
             update_data = obj_in.model_dump(exclude_unset=True)
         
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
+        values = {field: update_data[field] for field in obj_data if field in update_data}
         
         # Always update the updated_at timestamp
         if hasattr(db_obj, 'updated_at'):
-            db_obj.updated_at = datetime.now()
+            values['updated_at'] = datetime.now()
+        if not values:
+            return db_obj
             
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db_obj = db.execute(
+            update(self.model).where(self.model.id == db_obj.id).values(**values).returning(self.model),
+            execution_options={"populate_existing": True}
+        ).scalars().one()
+        commit_returning(db, db_obj)
         return db_obj
 
     def remove(self, db: Session, *, id: int) -> ModelType:
-        obj = db.query(self.model).get(id)
+        obj = db.get(self.model, id)
         db.delete(obj)
         db.commit()
         return obj
\ No newline at end of file
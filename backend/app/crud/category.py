@@ -2,10 +2,15 @@
 """
 分类CRUD操作
 """
-from typing import List, Optional
+from collections import defaultdict
+from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from app.models.document import Category
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import and_, or_, select, func, insert, update
+from app.core.cache import invalidate_category_cache
+from app.crud.base import commit_returning
+from app.db.category_counts import is_count_column_available
+from app.models.document import Category, Document
 from app.schemas.category import CategoryCreate, CategoryUpdate
 
 
@@ -41,35 +46,27 @@ def get_categories(
 
 def get_category_tree(db: Session, user_id: int) -> List[Category]:
     """获取分类树结构"""
-    # 先获取所有根分类
-    root_categories = db.query(Category).filter(
-        Category.parent_id.is_(None),
+    # 一次查询取出所有可见分类，再在内存中按父分类组装树
+    categories = db.query(Category).filter(
         or_(Category.creator_id == user_id, Category.creator_id.is_(None)),
         Category.is_active == True
     ).order_by(Category.sort_order, Category.name).all()
     
-    # 递归加载子分类
-    def load_children(category: Category):
-        children = db.query(Category).filter(
-            Category.parent_id == category.id,
-            or_(Category.creator_id == user_id, Category.creator_id.is_(None)),
-            Category.is_active == True
-        ).order_by(Category.sort_order, Category.name).all()
-        
-        for child in children:
-            load_children(child)
-        
-        category.children = children
+    children_by_parent: Dict[Optional[int], List[Category]] = defaultdict(list)
+    for category in categories:
+        children_by_parent[category.parent_id].append(category)
     
-    for category in root_categories:
-        load_children(category)
+    # 以“已加载”状态填充children关系：之后访问不会触发懒加载，
+    # 也不会把过滤后的列表当作修改写回数据库
+    for category in categories:
+        set_committed_value(category, "children", children_by_parent.get(category.id, []))
     
-    return root_categories
+    return children_by_parent[None]
 
 
 def create_category(db: Session, category: CategoryCreate, user_id: int) -> Category:
     """创建分类"""
-    db_category = Category(
+    db_category = db.scalars(insert(Category).values(
         name=category.name,
         description=category.description,
         color=category.color,
@@ -77,10 +74,9 @@ def create_category(db: Session, category: CategoryCreate, user_id: int) -> Cate
         parent_id=category.parent_id,
         sort_order=category.sort_order,
         creator_id=user_id
-    )
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
+    ).returning(Category)).one()
+    commit_returning(db, db_category)
+    invalidate_category_cache()
     return db_category
 
 
@@ -91,64 +87,73 @@ def update_category(
     user_id: int
 ) -> Optional[Category]:
     """更新分类"""
-    db_category = db.query(Category).filter(
+    owned = and_(
         Category.id == category_id,
         Category.creator_id == user_id  # 只允许创建者修改
-    ).first()
-    
-    if not db_category:
-        return None
+    )
     
     update_data = category_update.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_category, field, value)
+    if not update_data:
+        return db.query(Category).filter(owned).first()
     
-    db.commit()
-    db.refresh(db_category)
+    # 单条 UPDATE ... RETURNING，无需先加载行再逐个属性赋值
+    db_category = db.execute(
+        update(Category).where(owned).values(**update_data).returning(Category),
+        execution_options={"populate_existing": True}
+    ).scalars().first()
+    
+    commit_returning(db, db_category)
+    invalidate_category_cache()
     return db_category
 
 
 def delete_category(db: Session, category_id: int, user_id: int) -> bool:
     """删除分类（软删除）"""
-    db_category = db.query(Category).filter(
+    # 检查是否有子分类
+    has_children = db.query(Category.id).filter(Category.parent_id == category_id).first()
+    if has_children:
+        return False  # 有子分类时不允许删除
+    
+    # 软删除（只允许创建者删除）
+    deleted = db.query(Category).filter(
         Category.id == category_id,
         Category.creator_id == user_id
-    ).first()
+    ).update({"is_active": False}, synchronize_session=False)
     
-    if not db_category:
+    if not deleted:
         return False
     
-    # 检查是否有子分类
-    has_children = db.query(Category).filter(Category.parent_id == category_id).first()
-    if has_children:
-        return False  # 有子分类时不允许删除
-    
-    # 检查是否有关联文档
-    if db_category.documents:
-        # 有关联文档时，将文档的分类设为None
-        for doc in db_category.documents:
-            doc.category_id = None
+    # 有关联文档时，将文档的分类设为None
+    db.query(Document).filter(
+        Document.category_id == category_id
+    ).update({"category_id": None}, synchronize_session=False)
     
-    # 软删除
-    db_category.is_active = False
     db.commit()
+    invalidate_category_cache()
     return True
 
 
 def get_category_statistics(db: Session, user_id: int) -> dict:
     """获取分类统计信息"""
-    from app.models.document import Document
-    
-    # 获取各分类的文档数量
-    categories_with_count = db.query(
-        Category.id,
-        Category.name,
-        Category.color,
-        db.func.count(Document.id).label('document_count')
-    ).outerjoin(Document).filter(
+    visible = and_(
         or_(Category.creator_id == user_id, Category.creator_id.is_(None)),
         Category.is_active == True
-    ).group_by(Category.id, Category.name, Category.color).all()
+    )
+    # 获取各分类的文档数量：优先读取触发器维护的计数列
+    if is_count_column_available(db.get_bind().dialect.name):
+        categories_with_count = db.query(
+            Category.id,
+            Category.name,
+            Category.color,
+            Category.document_count
+        ).filter(visible).all()
+    else:
+        categories_with_count = db.query(
+            Category.id,
+            Category.name,
+            Category.color,
+            func.count(Document.id).label('document_count')
+        ).outerjoin(Document).filter(visible).group_by(Category.id, Category.name, Category.color).all()
     
     # 未分类文档数量
     uncategorized_count = db.query(Document).filter(
@@ -199,20 +204,28 @@ def move_category(
         if _would_create_cycle(db, category_id, new_parent_id):
             return None
     
-    db_category.parent_id = new_parent_id
-    db.commit()
-    db.refresh(db_category)
+    db_category = db.execute(
+        update(Category).where(Category.id == category_id).values(parent_id=new_parent_id).returning(Category),
+        execution_options={"populate_existing": True}
+    ).scalars().one()
+    commit_returning(db, db_category)
+    invalidate_category_cache()
     return db_category
 
 
 def _would_create_cycle(db: Session, category_id: int, new_parent_id: int) -> bool:
     """检查移动分类是否会创建循环引用"""
-    current_id = new_parent_id
-    while current_id is not None:
-        if current_id == category_id:
-            return True
-        
-        parent = db.query(Category).filter(Category.id == current_id).first()
-        current_id = parent.parent_id if parent else None
+    # 递归CTE一次取出新父分类的全部祖先链
+    ancestors = select(Category.id, Category.parent_id).where(
+        Category.id == new_parent_id
+    ).cte(name="ancestors", recursive=True)
+    ancestors = ancestors.union(
+        select(Category.id, Category.parent_id).join(
+            ancestors, Category.id == ancestors.c.parent_id
+        )
+    )
     
-    return False
\ No newline at end of file
+    hits = db.execute(
+        select(func.count()).select_from(ancestors).where(ancestors.c.id == category_id)
+    ).scalar()
+    return hits > 0
@@ -1,14 +1,75 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc, func
+import hashlib
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session, selectinload, raiseload
+from sqlalchemy import desc, asc, func, update, insert, select, lambda_stmt
+from app.core.cache import cache, invalidate_category_cache
+from app.crud.base import commit_returning
+from app.db import search_index, category_counts
 from app.models.document import Document, Category, DocumentView, DocumentDownload
 from app.schemas.document import DocumentCreate, DocumentUpdate, CategoryCreate, CategoryUpdate
+from app.services.view_buffer import view_buffer
+
+
+# 热门文档、分类列表等慢变化查询的结果缓存时间（秒）
+RESULT_CACHE_TTL = 60
+
+
+def compute_content_hash(data: bytes) -> str:
+    """计算文件内容摘要（BLAKE2b-256，比SHA-256更快）"""
+    return hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+def _document_list_options():
+    """文档列表查询的加载策略：批量预加载所有者和分类，其余关系禁止懒加载"""
+    return (
+        selectinload(Document.owner),
+        selectinload(Document.category),
+        raiseload("*"),
+    )
+
+
+def _load_in_order(db: Session, model, ids: List[int], options=()) -> list:
+    """按主键批量取回对象，并保持ids中的顺序"""
+    if not ids:
+        return []
+    stmt = lambda_stmt(lambda: select(model).options(*options).where(model.id.in_(ids)))
+    objs = {obj.id: obj for obj in db.execute(stmt).scalars().all()}
+    return [objs[id_] for id_ in ids if id_ in objs]
+
+
+def _get_active_categories(db: Session, skip: int, limit: int) -> List[Category]:
+    """获取启用的分类列表（结果缓存）"""
+    cache_key = f"categories:active:{skip}:{limit}"
+    ids = cache.get(cache_key)
+    if ids is None:
+        ids = [row.id for row in db.query(Category.id).filter(Category.is_active == True).order_by(
+            asc(Category.sort_order), asc(Category.name)
+        ).offset(skip).limit(limit).all()]
+        cache.set(cache_key, ids, RESULT_CACHE_TTL)
+    return _load_in_order(db, Category, ids)
 
 
 class CRUDDocument:
     def get(self, db: Session, id: int) -> Optional[Document]:
         """根据ID获取文档"""
-        return db.query(Document).filter(Document.id == id).first()
+        return db.get(Document, id)
+
+    @staticmethod
+    def _apply_filters(
+        stmt,
+        owner_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        status: Optional[str] = None
+    ):
+        """向lambda语句追加文档列表的通用过滤条件"""
+        if owner_id:
+            stmt += lambda s: s.where(Document.owner_id == owner_id)
+        if category_id:
+            stmt += lambda s: s.where(Document.category_id == category_id)
+        if status:
+            stmt += lambda s: s.where(Document.status == status)
+        return stmt
 
     def get_multi(
         self, 
@@ -20,16 +81,33 @@ class CRUDDocument:
         status: Optional[str] = None
     ) -> List[Document]:
         """获取文档列表"""
-        query = db.query(Document)
+        stmt = lambda_stmt(lambda: select(Document).options(*_document_list_options()))
+        stmt = self._apply_filters(stmt, owner_id, category_id, status)
+        stmt += lambda s: s.order_by(desc(Document.created_at)).offset(skip).limit(limit)
+        return db.execute(stmt).scalars().all()
+    
+    def list_and_count(
+        self,
+        db: Session,
+        skip: int = 0,
+        limit: int = 100,
+        owner_id: Optional[int] = None,
+        category_id: Optional[int] = None,
+        status: Optional[str] = None
+    ) -> Tuple[List[Document], int]:
+        """获取文档列表及总数，通过窗口函数一次查询完成"""
+        stmt = lambda_stmt(lambda: select(
+            Document, func.count().over().label("total")
+        ).options(*_document_list_options()))
+        stmt = self._apply_filters(stmt, owner_id, category_id, status)
+        stmt += lambda s: s.order_by(desc(Document.created_at)).offset(skip).limit(limit)
+        rows = db.execute(stmt).all()
         
-        if owner_id:
-            query = query.filter(Document.owner_id == owner_id)
-        if category_id:
-            query = query.filter(Document.category_id == category_id)
-        if status:
-            query = query.filter(Document.status == status)
-            
-        return query.order_by(desc(Document.created_at)).offset(skip).limit(limit).all()
+        if rows:
+            return [row[0] for row in rows], rows[0].total
+        
+        # 偏移超出范围时没有行可携带总数，单独统计
+        return [], self.count(db, owner_id=owner_id, category_id=category_id, status=status)
     
     def count(
         self,
@@ -39,16 +117,9 @@ class CRUDDocument:
         status: Optional[str] = None
     ) -> int:
         """统计文档数量"""
-        query = db.query(Document)
-        
-        if owner_id:
-            query = query.filter(Document.owner_id == owner_id)
-        if category_id:
-            query = query.filter(Document.category_id == category_id)
-        if status:
-            query = query.filter(Document.status == status)
-            
-        return query.count()
+        stmt = lambda_stmt(lambda: select(func.count(Document.id)))
+        stmt = self._apply_filters(stmt, owner_id, category_id, status)
+        return db.execute(stmt).scalar_one()
     
     def count_recent(
         self,
@@ -59,34 +130,63 @@ class CRUDDocument:
         status: Optional[str] = None
     ) -> int:
         """统计最近几天的文档数量"""
-        from datetime import datetime, timedelta
-        
-        query = db.query(Document)
-        
-        # 时间过滤
+        # 时间过滤：截止时间在Python侧算好，作为单个绑定参数传入
         recent_date = datetime.utcnow() - timedelta(days=days)
-        query = query.filter(Document.created_at >= recent_date)
+        stmt = lambda_stmt(lambda: select(func.count(Document.id)).where(
+            Document.created_at >= recent_date
+        ))
         
-        if owner_id:
-            query = query.filter(Document.owner_id == owner_id)
-        if category_id:
-            query = query.filter(Document.category_id == category_id)
-        if status:
-            query = query.filter(Document.status == status)
-            
-        return query.count()
+        stmt = self._apply_filters(stmt, owner_id, category_id, status)
+        return db.execute(stmt).scalar_one()
 
     def create(self, db: Session, obj_in: DocumentCreate, owner_id: int) -> Document:
         """创建文档"""
-        db_obj = Document(
-            **obj_in.model_dump(),
-            owner_id=owner_id
+        # INSERT ... RETURNING 一次取回服务端默认值
+        db_obj = db.scalars(
+            insert(Document).values(**obj_in.model_dump(), owner_id=owner_id).returning(Document)
+        ).one()
+        commit_returning(db, db_obj)
+        return db_obj
+
+    def get_reusable_by_content_hash(self, db: Session, content_hash: str, owner_id: int) -> Optional[Document]:
+        """查找同一用户内容相同且已完成内容提取的文档，可直接复用其文件和提取结果（不跨用户共用文件）"""
+        return db.query(Document).filter(
+            Document.content_hash == content_hash,
+            Document.owner_id == owner_id,
+            Document.content_extracted == True,
+            Document.file_path.isnot(None)
+        ).order_by(Document.id).first()
+
+    def create_from_existing(self, db: Session, obj_in: DocumentCreate, owner_id: int, source: Document,
+                             file_name: str, file_type: str, mime_type: Optional[str]) -> Document:
+        """以已有文档的文件和提取内容创建新文档，文件名和类型取自本次上传"""
+        data = obj_in.model_dump()
+        data.update(
+            file_path=source.file_path,
+            file_name=file_name,
+            file_size=source.file_size,
+            file_type=file_type,
+            mime_type=mime_type,
+            content_hash=source.content_hash,
+            content=source.content,
+            content_extracted=source.content_extracted
         )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db_obj = db.scalars(
+            insert(Document).values(**data, owner_id=owner_id).returning(Document)
+        ).one()
+        commit_returning(db, db_obj)
         return db_obj
 
+    def create_many(self, db: Session, objs_in: List[DocumentCreate], owner_id: int) -> List[Document]:
+        """批量创建文档，一次executemany插入并通过RETURNING直接返回对象"""
+        if not objs_in:
+            return []
+        
+        rows = [{**obj_in.model_dump(), "owner_id": owner_id} for obj_in in objs_in]
+        documents = db.scalars(insert(Document).returning(Document), rows).all()
+        commit_returning(db, *documents)
+        return documents
+
     def update(self, db: Session, db_obj: Document, obj_in) -> Document:
         """更新文档"""
         if hasattr(obj_in, 'model_dump'):
@@ -95,17 +195,20 @@ class CRUDDocument:
         else:
             # Dictionary
             update_data = obj_in
+        if not update_data:
+            return db_obj
             
-        for field, value in update_data.items():
-            setattr(db_obj, field, value)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        # 单条 UPDATE ... RETURNING 写回当前实例，不逐个属性赋值
+        db_obj = db.execute(
+            update(Document).where(Document.id == db_obj.id).values(**update_data).returning(Document),
+            execution_options={"populate_existing": True}
+        ).scalars().one()
+        commit_returning(db, db_obj)
         return db_obj
 
     def delete(self, db: Session, id: int) -> Document:
         """删除文档（仅数据库记录，不推荐直接使用）"""
-        obj = db.query(Document).get(id)
+        obj = db.get(Document, id)
         db.delete(obj)
         db.commit()
         return obj
@@ -131,6 +234,7 @@ class CRUDDocument:
             "success": False,
             "document_deleted": False,
             "file_deleted": False,
+            "file_shared": False,
             "document": None,
             "file_result": None,
             "error": None
@@ -139,7 +243,7 @@ class CRUDDocument:
         # 开始数据库事务
         try:
             # 1. 获取文档信息
-            document = db.query(Document).get(id)
+            document = db.get(Document, id)
             if not document:
                 result["error"] = "文档不存在"
                 return result
@@ -153,9 +257,16 @@ class CRUDDocument:
             # 2. 初始化文件管理器
             file_manager = FileManagerService()
             
-            # 3. 删除物理文件（如果存在）
+            # 3. 删除物理文件（如果存在）；内容去重后多个文档可能共用同一文件
             file_deleted = False
-            if document.file_path:
+            file_shared = document.file_path and db.query(Document.id).filter(
+                Document.file_path == document.file_path,
+                Document.id != document.id
+            ).first() is not None
+            if file_shared:
+                result["file_shared"] = True
+                logger.info(f"文档 {id} 的文件仍被其他文档引用，保留物理文件")
+            elif document.file_path:
                 file_result = file_manager.safe_delete_file(
                     document.file_path, 
                     backup_before_delete=backup_before_delete
@@ -200,27 +311,78 @@ class CRUDDocument:
         limit: int = 100
     ) -> List[Document]:
         """搜索文档"""
-        return db.query(Document).filter(
+        dialect = db.get_bind().dialect.name
+        
+        # SQLite: FTS5 trigram 索引，按相关度排序
+        if dialect == "sqlite" and search_index.is_fts_available(dialect):
+            phrase = search_index.sqlite_match_phrase(query)
+            if phrase is not None:
+                fts = search_index.DOCUMENTS_FTS
+                stmt = lambda_stmt(lambda: select(Document).options(*_document_list_options()).join(
+                    fts, fts.c.rowid == Document.id
+                ).where(
+                    fts.c.documents_fts.op("MATCH")(phrase)
+                ).order_by(fts.c.rank, desc(Document.updated_at)).offset(skip).limit(limit))
+                return db.execute(stmt).scalars().all()
+        
+        # PostgreSQL: 编号/主机名等子串查询，title、file_name 走 trigram 索引；
+        # description、content 没有trigram索引，仍与原LIKE扫描一样参与匹配，不缩小结果范围
+        if dialect == "postgresql" and search_index.use_pg_substring_search(query):
+            pattern = f"%{query}%"
+            stmt = lambda_stmt(lambda: select(Document).options(*_document_list_options()).where(
+                Document.title.ilike(pattern) |
+                Document.file_name.ilike(pattern) |
+                Document.description.ilike(pattern) |
+                Document.content.ilike(pattern)
+            ).order_by(desc(Document.updated_at)).offset(skip).limit(limit))
+            return db.execute(stmt).scalars().all()
+        
+        # PostgreSQL: tsvector GIN 索引，按 ts_rank 排序
+        if dialect == "postgresql" and search_index.is_fts_available(dialect):
+            vector = search_index.pg_document_tsvector()
+            tsquery = search_index.pg_plain_tsquery(query)
+            stmt = lambda_stmt(lambda: select(Document).options(*_document_list_options()).where(
+                vector.op("@@")(tsquery)
+            ).order_by(
+                desc(func.ts_rank(vector, tsquery)), desc(Document.updated_at)
+            ).offset(skip).limit(limit))
+            return db.execute(stmt).scalars().all()
+        
+        stmt = lambda_stmt(lambda: select(Document).options(*_document_list_options()).where(
             Document.title.contains(query) | 
             Document.description.contains(query) |
             Document.content.contains(query)
-        ).order_by(desc(Document.updated_at)).offset(skip).limit(limit).all()
+        ).order_by(desc(Document.updated_at)).offset(skip).limit(limit))
+        return db.execute(stmt).scalars().all()
 
     def get_popular(self, db: Session, limit: int = 10) -> List[Document]:
         """获取热门文档"""
-        return db.query(Document).order_by(
-            desc(Document.view_count)
-        ).limit(limit).all()
+        # 缓存排序后的文档ID，命中时只需按主键取回
+        cache_key = f"docs:popular:{limit}"
+        ids = cache.get(cache_key)
+        if ids is None:
+            stmt = lambda_stmt(lambda: select(Document.id).order_by(
+                desc(Document.view_count)
+            ).limit(limit))
+            ids = list(db.execute(stmt).scalars().all())
+            cache.set(cache_key, ids, RESULT_CACHE_TTL)
+        return _load_in_order(db, Document, ids, _document_list_options())
 
     def increment_view_count(self, db: Session, document_id: int, user_id: Optional[int] = None, ip_address: Optional[str] = None):
         """增加文档查看次数"""
-        # 更新文档查看次数
-        document = db.query(Document).filter(Document.id == document_id).first()
-        if document:
-            document.view_count += 1
-            db.commit()
+        # 计数缓冲运行时交由其合并后批量写入
+        if view_buffer.is_running:
+            view_buffer.record_view(document_id, user_id=user_id, ip_address=ip_address)
+            return
         
-        # 记录查看日志
+        # 更新文档查看次数（数据库端原子自增）
+        db.execute(
+            update(Document).where(Document.id == document_id).values(
+                view_count=func.coalesce(Document.view_count, 0) + 1
+            ).execution_options(synchronize_session=False)
+        )
+        
+        # 记录查看日志，与计数更新同一次提交
         view_log = DocumentView(
             document_id=document_id,
             user_id=user_id,
@@ -231,13 +393,19 @@ class CRUDDocument:
 
     def increment_download_count(self, db: Session, document_id: int, user_id: Optional[int] = None, ip_address: Optional[str] = None):
         """增加文档下载次数"""
-        # 更新文档下载次数
-        document = db.query(Document).filter(Document.id == document_id).first()
-        if document:
-            document.download_count += 1
-            db.commit()
+        # 计数缓冲运行时交由其合并后批量写入
+        if view_buffer.is_running:
+            view_buffer.record_download(document_id, user_id=user_id, ip_address=ip_address)
+            return
+        
+        # 更新文档下载次数（数据库端原子自增）
+        db.execute(
+            update(Document).where(Document.id == document_id).values(
+                download_count=func.coalesce(Document.download_count, 0) + 1
+            ).execution_options(synchronize_session=False)
+        )
         
-        # 记录下载日志
+        # 记录下载日志，与计数更新同一次提交
         download_log = DocumentDownload(
             document_id=document_id,
             user_id=user_id,
@@ -248,84 +416,86 @@ class CRUDDocument:
     
     def get_categories(self, db: Session, skip: int = 0, limit: int = 100) -> List[Category]:
         """获取分类列表"""
-        return db.query(Category).filter(Category.is_active == True).order_by(
-            asc(Category.sort_order), asc(Category.name)
-        ).offset(skip).limit(limit).all()
+        return _get_active_categories(db, skip=skip, limit=limit)
     
     def get_category(self, db: Session, id: int) -> Optional[Category]:
         """根据ID获取分类"""
-        return db.query(Category).filter(Category.id == id).first()
+        return db.get(Category, id)
     
     def create_category(self, db: Session, obj_in: CategoryCreate, creator_id: int) -> Category:
         """创建分类"""
-        db_obj = Category(
-            **obj_in.model_dump(),
-            creator_id=creator_id
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db_obj = db.scalars(
+            insert(Category).values(**obj_in.model_dump(), creator_id=creator_id).returning(Category)
+        ).one()
+        commit_returning(db, db_obj)
+        invalidate_category_cache()
         return db_obj
     
     def update_category(self, db: Session, db_obj: Category, obj_in: CategoryUpdate) -> Category:
         """更新分类"""
         update_data = obj_in.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_obj, field, value)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        if not update_data:
+            return db_obj
+        db_obj = db.execute(
+            update(Category).where(Category.id == db_obj.id).values(**update_data).returning(Category),
+            execution_options={"populate_existing": True}
+        ).scalars().one()
+        commit_returning(db, db_obj)
+        invalidate_category_cache()
         return db_obj
     
     def delete_category(self, db: Session, id: int) -> Category:
         """删除分类"""
-        obj = db.query(Category).get(id)
+        obj = db.get(Category, id)
         db.delete(obj)
         db.commit()
+        invalidate_category_cache()
         return obj
 
 
 class CRUDCategory:
     def get(self, db: Session, id: int) -> Optional[Category]:
         """根据ID获取分类"""
-        return db.query(Category).filter(Category.id == id).first()
+        return db.get(Category, id)
 
     def get_multi(self, db: Session, skip: int = 0, limit: int = 100) -> List[Category]:
         """获取分类列表"""
-        return db.query(Category).filter(Category.is_active == True).order_by(
-            asc(Category.sort_order), asc(Category.name)
-        ).offset(skip).limit(limit).all()
+        return _get_active_categories(db, skip=skip, limit=limit)
 
     def create(self, db: Session, obj_in: CategoryCreate, creator_id: int) -> Category:
         """创建分类"""
-        db_obj = Category(
-            **obj_in.model_dump(),
-            creator_id=creator_id
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db_obj = db.scalars(
+            insert(Category).values(**obj_in.model_dump(), creator_id=creator_id).returning(Category)
+        ).one()
+        commit_returning(db, db_obj)
+        invalidate_category_cache()
         return db_obj
 
     def update(self, db: Session, db_obj: Category, obj_in: CategoryUpdate) -> Category:
         """更新分类"""
         update_data = obj_in.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_obj, field, value)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        if not update_data:
+            return db_obj
+        db_obj = db.execute(
+            update(Category).where(Category.id == db_obj.id).values(**update_data).returning(Category),
+            execution_options={"populate_existing": True}
+        ).scalars().one()
+        commit_returning(db, db_obj)
+        invalidate_category_cache()
         return db_obj
 
     def delete(self, db: Session, id: int) -> Category:
         """删除分类"""
-        obj = db.query(Category).get(id)
+        obj = db.get(Category, id)
         db.delete(obj)
         db.commit()
+        invalidate_category_cache()
         return obj
 
     def get_with_document_count(self, db: Session) -> List[dict]:
         """获取分类及文档数量"""
+        if category_counts.is_count_column_available(db.get_bind().dialect.name):
+            return db.query(Category, Category.document_count).all()
         return db.query(
             Category,
             func.count(Document.id).label('document_count')
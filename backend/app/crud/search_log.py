@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+搜索日志CRUD操作
+"""
+import hashlib
+import time
+from typing import Any, Dict, Optional
+from sqlalchemy import func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.document import SearchLog
+
+_UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def normalize_query(query: str) -> str:
+    """规范化查询串：去掉首尾空白、合并连续空白并转为小写"""
+    return " ".join(query.split()).lower()
+
+
+def query_hash(query: str) -> str:
+    """规范化查询串的摘要，用于合并重复搜索日志"""
+    return hashlib.blake2b(normalize_query(query).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def record_search(
+    db: Session,
+    user_id: int,
+    query: str,
+    results_count: int,
+    response_time: float,
+    filters: Optional[Dict[str, Any]] = None
+) -> None:
+    """记录搜索日志，同一用户同一小时内的相同查询只累加次数"""
+    values = {
+        "user_id": user_id,
+        "query": query,
+        "results_count": results_count,
+        "response_time": response_time,
+        "filters": filters,
+        "query_hash": query_hash(query),
+        "hour_bucket": int(time.time() // 3600),
+        "hit_count": 1,
+    }
+    
+    dialect_insert = _UPSERT_INSERTS.get(db.get_bind().dialect.name)
+    if dialect_insert is None:
+        db.execute(insert(SearchLog).values(**values))
+    else:
+        stmt = dialect_insert(SearchLog).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[SearchLog.query_hash, SearchLog.user_id, SearchLog.hour_bucket],
+            set_={
+                "hit_count": SearchLog.hit_count + 1,
+                "results_count": stmt.excluded.results_count,
+                "response_time": stmt.excluded.response_time,
+                "filters": stmt.excluded.filters,
+                "created_at": func.now(),
+            }
+        )
+        db.execute(stmt)
+    db.commit()
@@ -1,14 +1,26 @@
+import hashlib
+import secrets
 from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy import insert, update
+from app.core.cache import SimpleMemoryCache
 from app.core.security import get_password_hash, verify_password
+from app.crud.base import commit_returning
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
 
+# 错误密码的短期缓存，减少暴力尝试时重复的bcrypt计算
+FAILED_LOGIN_CACHE_TTL = 30
+FAILED_LOGIN_CACHE_MAX_SIZE = 10000
+_failed_login_cache = SimpleMemoryCache(default_ttl=FAILED_LOGIN_CACHE_TTL)
+_FAILED_LOGIN_KEY = secrets.token_bytes(32)
+
+
 class CRUDUser:
     def get(self, db: Session, id: int) -> Optional[User]:
         """根据ID获取用户"""
-        return db.query(User).filter(User.id == id).first()
+        return db.get(User, id)
 
     def get_by_username(self, db: Session, username: str) -> Optional[User]:
         """根据用户名获取用户"""
@@ -20,7 +32,7 @@ class CRUDUser:
 
     def create(self, db: Session, obj_in: UserCreate) -> User:
         """创建用户"""
-        db_obj = User(
+        db_obj = db.scalars(insert(User).values(
             username=obj_in.username,
             email=obj_in.email,
             hashed_password=get_password_hash(obj_in.password),
@@ -30,20 +42,21 @@ class CRUDUser:
             phone=obj_in.phone,
             is_active=obj_in.is_active,
             is_superuser=obj_in.is_superuser,
-        )
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        ).returning(User)).one()
+        commit_returning(db, db_obj)
         return db_obj
 
     def update(self, db: Session, db_obj: User, obj_in: UserUpdate) -> User:
         """更新用户"""
         update_data = obj_in.model_dump(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_obj, field, value)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        if not update_data:
+            return db_obj
+        # 单条 UPDATE ... RETURNING 写回当前实例，不逐个属性赋值
+        db_obj = db.execute(
+            update(User).where(User.id == db_obj.id).values(**update_data).returning(User),
+            execution_options={"populate_existing": True}
+        ).scalars().one()
+        commit_returning(db, db_obj)
         return db_obj
 
     def authenticate(self, db: Session, username: str, password: str) -> Optional[User]:
@@ -51,10 +64,26 @@ class CRUDUser:
         user = self.get_by_username(db, username=username)
         if not user:
             return None
-        if not verify_password(password, user.hashed_password):
+        if not self._verify_password(username, password, user.hashed_password):
             return None
         return user
 
+    def _verify_password(self, username: str, password: str, hashed_password: str) -> bool:
+        """校验密码，短时间内重复的错误密码直接返回失败，不再执行bcrypt"""
+        # 键中包含当前密码哈希，改密码后旧的失败记录自然失效；只缓存失败结果
+        key = hashlib.blake2b(
+            "\0".join((username, password, hashed_password)).encode("utf-8"),
+            key=_FAILED_LOGIN_KEY, digest_size=16
+        ).hexdigest()
+        if _failed_login_cache.get(key):
+            return False
+        if verify_password(password, hashed_password):
+            return True
+        if len(_failed_login_cache.cache) >= FAILED_LOGIN_CACHE_MAX_SIZE:
+            _failed_login_cache.clear()
+        _failed_login_cache.set(key, True)
+        return False
+
     def is_active(self, user: User) -> bool:
         """检查用户是否激活"""
         return user.is_active
@@ -65,10 +94,12 @@ class CRUDUser:
 
     def update_password(self, db: Session, db_obj: User, new_password: str) -> User:
         """更新用户密码"""
-        db_obj.hashed_password = get_password_hash(new_password)
-        db.add(db_obj)
-        db.commit()
-        db.refresh(db_obj)
+        db_obj = db.execute(
+            update(User).where(User.id == db_obj.id)
+            .values(hashed_password=get_password_hash(new_password)).returning(User),
+            execution_options={"populate_existing": True}
+        ).scalars().one()
+        commit_returning(db, db_obj)
         return db_obj
 
 
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+分类文档数量计数列
+
+categories.document_count 由数据库触发器维护（文档新增、删除、修改分类时增减），
+读取分类文档数量时无需再对 documents 表做聚合。目前支持 SQLite 和 PostgreSQL，
+其余数据库回退为 OUTER JOIN + GROUP BY 聚合。
+"""
+import logging
+from sqlalchemy import text, inspect
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_counts_available = {"sqlite": False, "postgresql": False}
+
+_ADD_COLUMN_DDL = "ALTER TABLE categories ADD COLUMN document_count INTEGER NOT NULL DEFAULT 0"
+
+_BACKFILL_SQL = """
+    UPDATE categories SET document_count = (
+        SELECT count(*) FROM documents WHERE documents.category_id = categories.id
+    )
+"""
+
+_SQLITE_TRIGGERS = {
+    "documents_category_count_ai": """
+        CREATE TRIGGER documents_category_count_ai AFTER INSERT ON documents
+        WHEN new.category_id IS NOT NULL BEGIN
+            UPDATE categories SET document_count = document_count + 1 WHERE id = new.category_id;
+        END
+    """,
+    "documents_category_count_ad": """
+        CREATE TRIGGER documents_category_count_ad AFTER DELETE ON documents
+        WHEN old.category_id IS NOT NULL BEGIN
+            UPDATE categories SET document_count = document_count - 1 WHERE id = old.category_id;
+        END
+    """,
+    "documents_category_count_au": """
+        CREATE TRIGGER documents_category_count_au AFTER UPDATE OF category_id ON documents
+        WHEN old.category_id IS NOT new.category_id BEGIN
+            UPDATE categories SET document_count = document_count - 1 WHERE id = old.category_id;
+            UPDATE categories SET document_count = document_count + 1 WHERE id = new.category_id;
+        END
+    """,
+}
+
+_PG_FUNCTION = """
+    CREATE OR REPLACE FUNCTION documents_category_count() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.category_id IS NOT NULL THEN
+            UPDATE categories SET document_count = document_count - 1 WHERE id = OLD.category_id;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.category_id IS NOT NULL THEN
+            UPDATE categories SET document_count = document_count + 1 WHERE id = NEW.category_id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+_PG_TRIGGER = """
+    CREATE TRIGGER documents_category_count
+    AFTER INSERT OR DELETE OR UPDATE OF category_id ON documents
+    FOR EACH ROW EXECUTE FUNCTION documents_category_count()
+"""
+
+
+def ensure_category_document_counts(engine: Engine) -> None:
+    """补齐计数列和触发器（幂等），新建触发器时按现有数据回填计数"""
+    dialect = engine.dialect.name
+    if dialect not in _counts_available:
+        return
+    try:
+        with engine.begin() as conn:
+            columns = {col["name"] for col in inspect(conn).get_columns("categories")}
+            if "document_count" not in columns:
+                conn.execute(text(_ADD_COLUMN_DDL))
+
+            if dialect == "sqlite":
+                existing = {row[0] for row in conn.execute(text(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'documents'"
+                ))}
+                missing = [name for name in _SQLITE_TRIGGERS if name not in existing]
+                for name in missing:
+                    conn.execute(text(_SQLITE_TRIGGERS[name]))
+            else:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM pg_trigger WHERE tgname = 'documents_category_count'"
+                )).first()
+                missing = [] if exists else ["documents_category_count"]
+                if missing:
+                    conn.execute(text(_PG_FUNCTION))
+                    conn.execute(text(_PG_TRIGGER))
+
+            if missing:
+                conn.execute(text(_BACKFILL_SQL))
+                logger.info("已创建分类文档计数触发器并回填计数")
+        _counts_available[dialect] = True
+    except Exception as e:
+        logger.warning(f"分类文档计数不可用，将回退为聚合查询: {e}")
+
+
+def is_count_column_available(dialect: str) -> bool:
+    """当前方言下 categories.document_count 是否由触发器维护"""
+    return _counts_available.get(dialect, False)
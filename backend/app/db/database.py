@@ -1,14 +1,22 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
+engine_options = {}
+# psycopg2：INSERT走多值VALUES，UPDATE/DELETE的executemany走execute_batch，减少网络往返
+if make_url(settings.DATABASE_URL).drivername in ("postgresql", "postgresql+psycopg2"):
+    engine_options["executemany_mode"] = "values_plus_batch"
+
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
     pool_recycle=300,
     pool_size=20,
-    max_overflow=0
+    max_overflow=0,
+    insertmanyvalues_page_size=1000,  # 批量插入时每条多值INSERT携带的行数
+    **engine_options
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -22,4 +30,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+已有数据库的表结构补齐
+
+create_tables 只创建缺失的表，已有表上后续新增的列和索引在这里按清单补齐（幂等）。
+仓库目前没有 Alembic 迁移脚本，升级部署依赖这里的处理；新增的结构变更需同步登记到清单中。
+"""
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from app.db.database import Base
+
+logger = logging.getLogger(__name__)
+
+# 表名 -> 在已有表上补加的列名，列定义取自模型元数据（必须可空或带服务端默认值）
+_ADDED_COLUMNS = {
+    "documents": ("content_hash",),
+    "search_logs": ("query_hash", "hour_bucket", "hit_count"),
+}
+
+# 补加列后执行的回填语句。已有搜索日志不计算摘要，query_hash/hour_bucket 保持 NULL：
+# 唯一索引中 NULL 互不冲突，旧记录无需去重，也不会与新记录合并
+_COLUMN_BACKFILL = {
+    ("search_logs", "hit_count"): "UPDATE search_logs SET hit_count = 1 WHERE hit_count IS NULL",
+}
+
+# 表名 -> 在已有表上补建的索引名，索引定义取自模型元数据
+_ADDED_INDEXES = {
+    "documents": (
+        "ix_documents_content_hash", "ix_doc_owner_status_created", "ix_doc_category_status_created"
+    ),
+    "assets": ("ix_assets_updated_at_desc", "ix_asset_status_type"),
+    "document_views": ("ix_document_views_document_created",),
+    "document_downloads": ("ix_document_downloads_document_created",),
+    "search_logs": ("ix_search_logs_query_hash", "ux_search_log_query_user_hour"),
+}
+
+
+def ensure_schema_upgrades(engine: Engine) -> None:
+    """为已有表补加清单中缺失的列，再补建索引（CREATE INDEX IF NOT EXISTS），在 create_tables 之后调用"""
+    try:
+        with engine.begin() as conn:
+            inspector = inspect(conn)
+            existing_tables = set(inspector.get_table_names())
+            for table_name, column_names in _ADDED_COLUMNS.items():
+                if table_name not in existing_tables:
+                    continue
+                present = {col["name"] for col in inspector.get_columns(table_name)}
+                table = Base.metadata.tables[table_name]
+                for name in column_names:
+                    if name not in present:
+                        column_ddl = CreateColumn(table.c[name]).compile(dialect=conn.dialect)
+                        conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}"))
+                        backfill = _COLUMN_BACKFILL.get((table_name, name))
+                        if backfill:
+                            conn.execute(text(backfill))
+                        logger.info(f"已为 {table_name} 补加列 {name}")
+            for table_name, index_names in _ADDED_INDEXES.items():
+                if table_name not in existing_tables:
+                    continue
+                for index in Base.metadata.tables[table_name].indexes:
+                    if index.name in index_names:
+                        conn.execute(CreateIndex(index, if_not_exists=True))
+    except Exception as e:
+        logger.warning(f"已有表结构补齐失败，请手动执行升级: {e}")
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+文档全文检索索引
+
+SQLite 使用 FTS5 外部内容表（trigram 分词，支持中文子串匹配），
+PostgreSQL 使用 tsvector 表达式上的 GIN 索引，另在 title/file_name 上建 pg_trgm
+索引，供编号、主机名等分词效果差的子串查询使用（这类查询同时扫描 description/content，
+结果范围与 LIKE 一致）；'simple' 分词器不切分中文，含中文的查询在 PostgreSQL 上也走子串匹配。
+其余数据库回退为 LIKE 扫描。
+资产搜索字段拼接表达式上的 pg_trgm 索引也在这里创建。
+"""
+import logging
+import re
+from typing import Optional
+from sqlalchemy import text, func, column, table
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql.expression import literal_column
+from app.models.asset import ASSET_SEARCH_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# 启动时根据实际创建结果设置，键为方言名
+_fts_available = {"sqlite": False, "postgresql": False}
+
+# trigram分词要求查询词至少3个字符
+SQLITE_FTS_MIN_QUERY_LENGTH = 3
+
+DOCUMENTS_FTS = table("documents_fts", column("rowid"), column("rank"), column("documents_fts"))
+
+_SQLITE_FTS_DDL = [
+    """
+    CREATE VIRTUAL TABLE documents_fts USING fts5(
+        title, description, content,
+        content='documents', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS documents_fts_ai AFTER INSERT ON documents BEGIN
+        INSERT INTO documents_fts(rowid, title, description, content)
+        VALUES (new.id, new.title, new.description, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS documents_fts_ad AFTER DELETE ON documents BEGIN
+        INSERT INTO documents_fts(documents_fts, rowid, title, description, content)
+        VALUES ('delete', old.id, old.title, old.description, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS documents_fts_au AFTER UPDATE OF title, description, content ON documents BEGIN
+        INSERT INTO documents_fts(documents_fts, rowid, title, description, content)
+        VALUES ('delete', old.id, old.title, old.description, old.content);
+        INSERT INTO documents_fts(rowid, title, description, content)
+        VALUES (new.id, new.title, new.description, new.content);
+    END
+    """,
+    # 为已有文档建立索引
+    "INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')",
+]
+
+_PG_TSVECTOR_SQL = (
+    "to_tsvector('simple', coalesce(title, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(content, ''))"
+)
+
+_PG_FTS_DDL = (
+    f"CREATE INDEX IF NOT EXISTS ix_documents_fts ON documents USING gin ({_PG_TSVECTOR_SQL})"
+)
+
+_PG_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_doc_title_trgm ON documents USING gin (title gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_doc_file_name_trgm ON documents USING gin (file_name gin_trgm_ops)",
+]
+
+# 与 asset_search_text() 的拼接表达式一致，ILIKE 查询才能使用该索引
+_PG_ASSET_TRGM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_assets_search_trgm ON assets USING gin (("
+    + " || ' ' || ".join(f"coalesce({field}, '')" for field in ASSET_SEARCH_FIELDS)
+    + ") gin_trgm_ops)",
+]
+
+# 含标点（如 IP、主机名、编号）的查询，tsquery 分词后难以命中
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+# 'simple' 分词器把连续的中日文字符整段作为一个词，tsquery 查不到长句中的一部分，
+# 含这类字符的查询需改走子串匹配（SQLite 的 trigram 分词不受影响）
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
+
+def ensure_document_search_index(engine: Engine) -> None:
+    """创建文档全文索引（幂等），在建表之后调用"""
+    dialect = engine.dialect.name
+    try:
+        if dialect == "sqlite":
+            with engine.begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'documents_fts'"
+                )).first()
+                if not exists:
+                    for statement in _SQLITE_FTS_DDL:
+                        conn.execute(text(statement))
+                    logger.info("已创建文档FTS5全文索引")
+            _fts_available["sqlite"] = True
+        elif dialect == "postgresql":
+            with engine.begin() as conn:
+                conn.execute(text(_PG_FTS_DDL))
+            _fts_available["postgresql"] = True
+    except Exception as e:
+        logger.warning(f"文档全文索引不可用，搜索将回退为LIKE扫描: {e}")
+
+    if dialect == "postgresql":
+        _ensure_pg_trigram_index(engine)
+
+
+def _ensure_pg_trigram_index(engine: Engine) -> None:
+    """创建标题/文件名的trigram索引，需要pg_trgm扩展权限，失败不影响全文索引"""
+    try:
+        with engine.begin() as conn:
+            for statement in _PG_TRGM_DDL:
+                conn.execute(text(statement))
+    except Exception as e:
+        logger.warning(f"pg_trgm索引不可用，子串查询将顺序扫描: {e}")
+
+
+def ensure_asset_search_index(engine: Engine) -> None:
+    """创建资产搜索字段的trigram索引（幂等），已有数据库也会补建；仅PostgreSQL"""
+    if engine.dialect.name != "postgresql":
+        return
+    try:
+        with engine.begin() as conn:
+            for statement in _PG_ASSET_TRGM_DDL:
+                conn.execute(text(statement))
+    except Exception as e:
+        logger.warning(f"资产trigram索引不可用，搜索将回退为顺序扫描: {e}")
+
+
+def is_fts_available(dialect: str) -> bool:
+    """当前方言的全文索引是否可用"""
+    return _fts_available.get(dialect, False)
+
+
+def use_pg_substring_search(query: str) -> bool:
+    """短查询、含标点或含中日文字符的查询在PostgreSQL上改走子串匹配（title/file_name 可用trigram索引）
+
+    tsquery 对这类查询会漏掉结果；没有 pg_trgm 时子串匹配同原 LIKE 一样顺序扫描，结果仍然正确
+    """
+    return (
+        len(query) < SQLITE_FTS_MIN_QUERY_LENGTH
+        or _PUNCTUATION_RE.search(query) is not None
+        or _CJK_RE.search(query) is not None
+    )
+
+
+def pg_document_tsvector():
+    """与PostgreSQL GIN索引一致的tsvector表达式"""
+    return literal_column(_PG_TSVECTOR_SQL)
+
+
+def pg_plain_tsquery(query: str):
+    return func.plainto_tsquery(literal_column("'simple'"), query)
+
+
+def sqlite_match_phrase(query: str) -> Optional[str]:
+    """将用户输入转换为FTS5短语查询，过短时返回None"""
+    if len(query) < SQLITE_FTS_MIN_QUERY_LENGTH:
+        return None
+    return '"' + query.replace('"', '""') + '"'
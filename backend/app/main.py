@@ -1,6 +1,7 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import inspect
 import os
 import warnings
 
@@ -11,7 +12,7 @@ warnings.filterwarnings("ignore", category=UserWarning, module="passlib.*")
 
 from app.api.api_v1 import api_router
 from app.core.config import settings
-from app.db.database import engine
+from app.db.database import Base, engine
 from app.models import user, document, asset, ai_config, system_config
 
 # 设置时区环境变量
@@ -39,12 +40,25 @@ def verify_bcrypt_functionality():
         print(f"ERROR: bcrypt功能测试失败: {e}")
         return False
 
-# 创建数据库表
-user.Base.metadata.create_all(bind=engine)
-document.Base.metadata.create_all(bind=engine)
-asset.Base.metadata.create_all(bind=engine)
-ai_config.Base.metadata.create_all(bind=engine)
-system_config.Base.metadata.create_all(bind=engine)
+# 创建数据库表（所有模型共用同一个Base）
+def create_tables():
+    """一次反射查出已有表，只创建缺失的表；已有表上新增的列和索引由 app/db/schema_upgrade.py 补齐"""
+    from app.db.schema_upgrade import ensure_schema_upgrades
+    existing_tables = set(inspect(engine).get_table_names())
+    missing_tables = [t for t in Base.metadata.sorted_tables if t.name not in existing_tables]
+    if missing_tables:
+        Base.metadata.create_all(bind=engine, tables=missing_tables, checkfirst=False)
+    ensure_schema_upgrades(engine)
+
+# 建表、全文索引和分类文档计数触发器都属于DDL，统一受AUTO_CREATE_TABLES控制；
+# 关闭时搜索回退为LIKE查询，分类计数回退为聚合查询
+if settings.AUTO_CREATE_TABLES:
+    from app.db.search_index import ensure_document_search_index, ensure_asset_search_index
+    from app.db.category_counts import ensure_category_document_counts
+    create_tables()
+    ensure_document_search_index(engine)
+    ensure_asset_search_index(engine)
+    ensure_category_document_counts(engine)
 
 # 初始化默认用户
 def init_default_users():
@@ -98,6 +112,20 @@ def startup_background_tasks():
         print("后台任务处理器已启动")
     except Exception as e:
         print(f"后台任务处理器启动失败: {e}")
+    
+    try:
+        from app.services.view_buffer import start_view_buffer
+        start_view_buffer()
+        print("文档计数缓冲已启动")
+    except Exception as e:
+        print(f"文档计数缓冲启动失败: {e}")
+
+def shutdown_background_tasks():
+    try:
+        from app.services.view_buffer import stop_view_buffer
+        stop_view_buffer()
+    except Exception as e:
+        print(f"文档计数缓冲停止失败: {e}")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -131,6 +159,7 @@ async def lifespan(app: FastAPI):
     
     # 关闭时执行
     print("应用程序正在关闭...")
+    shutdown_background_tasks()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Enum, Index
+from sqlalchemy.sql.expression import literal_column
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.db.database import Base
@@ -107,6 +108,27 @@ class Asset(Base):
     # 关系 - 移除back_populates避免循环引用
     creator = relationship("User")
     source_document = relationship("Document")
+    
+    __table_args__ = (
+        Index("ix_assets_updated_at_desc", updated_at.desc()),
+        # 资产列表按状态+类型过滤
+        Index("ix_asset_status_type", status, asset_type),
+    )
+
+
+# 全文搜索使用的拼接表达式，与PostgreSQL上的trigram表达式索引（app/db/search_index.py）保持一致
+ASSET_SEARCH_FIELDS = (
+    "name", "hostname", "ip_address", "device_model", "service_name", "application", "notes"
+)
+
+
+def asset_search_text():
+    """返回资产全文搜索字段的拼接表达式"""
+    expr = None
+    for field in ASSET_SEARCH_FIELDS:
+        part = func.coalesce(getattr(Asset, field), literal_column("''"))
+        expr = part if expr is None else expr + literal_column("' '") + part
+    return expr
 
 
 class AssetExtractRule(Base):
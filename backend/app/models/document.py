@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, JSON, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -16,6 +16,7 @@ class Document(Base):
     file_size = Column(Integer)
     file_type = Column(String(50))
     mime_type = Column(String(100))
+    content_hash = Column(String(64), index=True)  # 文件内容BLAKE2b摘要，用于上传去重
     
     # 分类和标签
     category_id = Column(Integer, ForeignKey("categories.id"))
@@ -48,6 +49,12 @@ class Document(Base):
     category = relationship("Category", back_populates="documents")
     parent = relationship("Document", remote_side=[id])
     children = relationship("Document", overlaps="parent")
+    
+    # 与文档列表的过滤条件及排序对应的复合索引
+    __table_args__ = (
+        Index("ix_doc_owner_status_created", owner_id, status, created_at.desc()),
+        Index("ix_doc_category_status_created", category_id, status, created_at.desc()),
+    )
 
 
 class Category(Base):
@@ -61,6 +68,8 @@ class Category(Base):
     parent_id = Column(Integer, ForeignKey("categories.id"))
     sort_order = Column(Integer, default=0)
     is_active = Column(Boolean, default=True)
+    # 文档数量，由数据库触发器维护（见 app/db/category_counts.py）
+    document_count = Column(Integer, nullable=False, default=0, server_default="0")
     
     # 创建者
     creator_id = Column(Integer, ForeignKey("users.id"))
@@ -86,11 +95,20 @@ class SearchLog(Base):
     response_time = Column(Float)  # 毫秒
     filters = Column(JSON)  # 搜索过滤条件
     
-    # 时间戳
+    # 同一用户同一小时内的相同查询合并为一行（见 app/crud/search_log.py）
+    query_hash = Column(String(32), index=True)  # 规范化查询串的BLAKE2b摘要
+    hour_bucket = Column(Integer)  # 所在小时（Unix时间 // 3600）
+    hit_count = Column(Integer, default=1)  # 该小时内的搜索次数
+    
+    # 时间戳（合并后为该小时内最后一次搜索的时间）
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # 关联关系
     user = relationship("User", back_populates="search_logs")
+    
+    __table_args__ = (
+        Index("ux_search_log_query_user_hour", query_hash, user_id, hour_bucket, unique=True),
+    )
 
 
 class DocumentView(Base):
@@ -105,6 +123,10 @@ class DocumentView(Base):
     
     # 时间戳
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_document_views_document_created", document_id, created_at),
+    )
 
 
 class DocumentDownload(Base):
@@ -118,6 +140,10 @@ class DocumentDownload(Base):
     
     # 时间戳
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        Index("ix_document_downloads_document_created", document_id, created_at),
+    )
 
 
 class AssetView(Base):
@@ -21,8 +21,8 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    # 关联关系 - 使用延迟加载避免循环导入问题
-    documents = relationship("Document", back_populates="owner", lazy="dynamic")
-    categories = relationship("Category", back_populates="creator", lazy="dynamic")
-    search_logs = relationship("SearchLog", back_populates="user", lazy="dynamic")
-    ai_configs = relationship("AIUserConfig", back_populates="user", lazy="dynamic")
\ No newline at end of file
+    # 关联关系 - 普通延迟加载，仅在访问时查询一次；需要分页/过滤时使用CRUD方法（如 document.get_multi(owner_id=...)）
+    documents = relationship("Document", back_populates="owner")
+    categories = relationship("Category", back_populates="creator")
+    search_logs = relationship("SearchLog", back_populates="user")
+    ai_configs = relationship("AIUserConfig", back_populates="user")
\ No newline at end of file
@@ -1,12 +1,52 @@
 # -*- coding: utf-8 -*-
-from typing import List, Optional, Dict, Any
+from typing import Annotated, List, Optional, Dict, Any
 from datetime import datetime, timezone, timedelta
-from pydantic import BaseModel, Field, validator
+import orjson
+from pydantic import BaseModel, BeforeValidator, ConfigDict, Field, TypeAdapter, validator
+from typing_extensions import TypedDict
 from app.models.asset import AssetStatus, AssetType, NetworkLocation
+from app.schemas.base import LazyModel, ORMConstructMixin, partial_model
+
+BEIJING_TZ = timezone(timedelta(hours=8))
+
+
+def _split_tags(v):
+    """逗号分隔的标签字符串转为列表"""
+    if isinstance(v, str):
+        return [tag.strip() for tag in v.split(',') if tag.strip()]
+    return v
+
+
+# 标签字段类型：字符串先拆分为列表，其余交给 pydantic-core 按 List[str] 校验
+Tags = Annotated[Optional[List[str]], BeforeValidator(_split_tags)]
+
+
+def _parse_merged_from(v):
+    """JSON格式的合并来源ID列表转为列表"""
+    if v and isinstance(v, (str, bytes)):
+        try:
+            return orjson.loads(v)
+        except orjson.JSONDecodeError:
+            return []
+    return v
+
+
+def _to_beijing_time(v):
+    """时间转换为北京时间，无时区信息时视为UTC"""
+    if isinstance(v, datetime):
+        if v.tzinfo is None:
+            v = v.replace(tzinfo=timezone.utc)
+        return v.astimezone(BEIJING_TZ)
+    return v
+
+_MAINTENANCE_DATE_FIELDS = ('purchase_date', 'warranty_expiry', 'last_maintenance', 'next_maintenance')
 
 
 class AssetBase(BaseModel):
     """资产基础模型"""
+    # 类型/状态/网络字段按字符串存储，传入枚举成员时直接取其值
+    model_config = ConfigDict(use_enum_values=True)
+
     name: str = Field(..., description="设备名称")
     asset_type: str = Field(..., description="资产类型")
     device_model: Optional[str] = Field(None, description="设备型号")
@@ -18,7 +58,7 @@ class AssetBase(BaseModel):
     mac_address: Optional[str] = Field(None, description="MAC地址")
     hostname: Optional[str] = Field(None, description="主机名")
     port: Optional[int] = Field(None, description="端口号")
-    network_location: str = Field(NetworkLocation.OFFICE, description="所处网络")
+    network_location: str = Field(NetworkLocation.OFFICE.value, description="所处网络")
     
     # 认证信息
     username: Optional[str] = Field(None, description="用户名")
@@ -37,7 +77,7 @@ class AssetBase(BaseModel):
     storage: Optional[str] = Field(None, description="存储信息")
     
     # 状态和管理信息
-    status: str = Field("active", description="资产状态")
+    status: str = Field(AssetStatus.ACTIVE.value, description="资产状态")
     department: Optional[str] = Field(None, description="所属部门")
     
     # 业务信息
@@ -53,7 +93,7 @@ class AssetBase(BaseModel):
     
     # 备注和标签
     notes: Optional[str] = Field(None, description="备注")
-    tags: Optional[List[str]] = Field(None, description="标签")
+    tags: Tags = Field(None, description="标签")
     
     # 数据来源
     source_file: Optional[str] = Field(None, description="数据来源文件")
@@ -62,55 +102,20 @@ class AssetBase(BaseModel):
     # 自动合并信息
     confidence_score: int = Field(100, description="数据置信度(0-100)")
 
-    @validator('tags', pre=True)
-    def parse_tags(cls, v):
-        if isinstance(v, str):
-            return [tag.strip() for tag in v.split(',') if tag.strip()]
-        return v
-
 
 class AssetCreate(AssetBase):
     """创建资产模型"""
     pass
 
 
-class AssetUpdate(BaseModel):
-    """更新资产模型"""
-    name: Optional[str] = None
-    asset_type: Optional[str] = None
-    device_model: Optional[str] = None
-    manufacturer: Optional[str] = None
-    serial_number: Optional[str] = None
-    ip_address: Optional[str] = None
-    mac_address: Optional[str] = None
-    hostname: Optional[str] = None
-    port: Optional[int] = None
-    network_location: Optional[str] = None
-    username: Optional[str] = None
-    password: Optional[str] = None
-    ssh_key: Optional[str] = None
-    location: Optional[str] = None
-    rack_position: Optional[str] = None
-    datacenter: Optional[str] = None
-    os_version: Optional[str] = None
-    cpu: Optional[str] = None
-    memory: Optional[str] = None
-    storage: Optional[str] = None
-    status: Optional[str] = None
-    department: Optional[str] = None
-    service_name: Optional[str] = None
-    application: Optional[str] = None
-    purpose: Optional[str] = None
-    purchase_date: Optional[datetime] = None
-    warranty_expiry: Optional[datetime] = None
-    last_maintenance: Optional[datetime] = None
-    next_maintenance: Optional[datetime] = None
-    notes: Optional[str] = None
-    tags: Optional[List[str]] = None
-    confidence_score: Optional[int] = None
-
-
-class Asset(AssetBase):
+# 更新模型：AssetBase 全部字段改为可选（来源信息不允许通过更新修改）
+AssetUpdate = partial_model(
+    "AssetUpdate", AssetBase, module=__name__, doc="更新资产模型",
+    exclude=("source_file", "source_document_id")
+)
+
+
+class Asset(ORMConstructMixin, AssetBase):
     """完整资产模型"""
     id: int
     is_merged: bool = False
@@ -124,13 +129,7 @@ class Asset(AssetBase):
 
     @validator('merged_from', pre=True)
     def parse_merged_from(cls, v):
-        if isinstance(v, str) and v:
-            import json
-            try:
-                return json.loads(v)
-            except json.JSONDecodeError:
-                return []
-        return v
+        return _parse_merged_from(v)
     
     @validator('created_at', 'updated_at', pre=True, always=True)
     def ensure_timezone_aware(cls, v):
@@ -143,23 +142,23 @@ class Asset(AssetBase):
             return v
         return v
     
-    @validator('purchase_date', 'warranty_expiry', 'last_maintenance', 'next_maintenance', pre=True, always=True)
+    @validator(*_MAINTENANCE_DATE_FIELDS, pre=True, always=True)
     def convert_maintenance_dates(cls, v):
         """维护日期时间转换为北京时间"""
-        if v is None:
-            return v
-        if isinstance(v, datetime):
-            # 北京时区
-            beijing_tz = timezone(timedelta(hours=8))
-            if v.tzinfo is None:
-                # 无时区信息，假设为UTC时间
-                v = v.replace(tzinfo=timezone.utc)
-            # 转换为北京时间
-            return v.astimezone(beijing_tz)
-        return v
+        return _to_beijing_time(v)
 
+    @classmethod
+    def _prepare_orm_data(cls, data):
+        # 与上面的 pre 校验器一致：标签拆分、合并来源解析、维护日期转北京时间
+        # （created_at/updated_at 的校验器不做转换，BeijingDateTime 列类型已处理）
+        data['tags'] = _split_tags(data.get('tags'))
+        data['merged_from'] = _parse_merged_from(data.get('merged_from'))
+        for field in _MAINTENANCE_DATE_FIELDS:
+            data[field] = _to_beijing_time(data.get(field))
+        return data
 
-class AssetSearchQuery(BaseModel):
+
+class AssetSearchQuery(LazyModel):
     """资产搜索查询模型"""
     query: Optional[str] = Field(None, description="搜索关键词")
     asset_type: Optional[str] = Field(None, description="资产类型")
@@ -172,7 +171,7 @@ class AssetSearchQuery(BaseModel):
     per_page: int = Field(20, ge=1, le=100, description="每页数量")
 
 
-class AssetExtractRequest(BaseModel):
+class AssetExtractRequest(LazyModel):
     """资产提取请求模型"""
     document_id: int = Field(..., description="文档ID")
     auto_merge: bool = Field(True, description="是否自动合并相似设备")
@@ -187,17 +186,15 @@ class AssetExtractResult(BaseModel):
     errors: List[str] = Field(default_factory=list, description="提取过程中的错误")
 
 
-class AssetMergeRequest(BaseModel):
+class AssetMergeRequest(LazyModel):
     """资产合并请求模型"""
     source_ids: List[int] = Field(..., description="要合并的源资产ID列表")
     target_id: Optional[int] = Field(None, description="目标资产ID(如果不指定则创建新资产)")
     merge_strategy: str = Field("smart", description="合并策略: smart/newest/manual")
 
 
-class AssetBulkImportRequest(BaseModel):
-    """资产批量导入请求模型"""
-    file_content: str = Field(..., description="文件内容(base64编码)")
-    file_type: str = Field(..., description="文件类型: csv/xlsx/json")
+class AssetBulkImportRequest(LazyModel):
+    """资产批量导入请求模型（文件本身以 multipart UploadFile 上传，类型取自文件扩展名）"""
     mapping: Dict[str, str] = Field(..., description="字段映射关系")
     auto_merge: bool = Field(True, description="是否自动合并")
 
@@ -218,12 +215,16 @@ class AssetSingleConfirmRequest(BaseModel):
     existing_id: Optional[int] = Field(None, description="现有资产ID（用于更新）")
 
 
-class AssetStatistics(BaseModel):
-    """资产统计模型"""
+class AssetStatistics(TypedDict):
+    """资产统计（TypedDict）"""
     total_count: int
     by_type: Dict[str, int]
     by_status: Dict[str, int]
     by_network_location: Dict[str, int]
     by_department: Dict[str, int]
     recent_additions: int  # 最近30天新增
-    pending_maintenance: int  # 待维护数量
\ No newline at end of file
+    pending_maintenance: int  # 待维护数量
+
+
+# 列表校验适配器：模块级创建一次，整批校验时复用，避免每次重新构建校验器
+AssetListAdapter = TypeAdapter(List[Asset])
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+响应模型公共工具
+"""
+from copy import copy
+from typing import Any, Dict, Iterable, Optional, Type
+from pydantic import BaseModel, ConfigDict, create_model
+
+# 数据库读出的数据视为可信，列表接口直接构造响应模型、跳过字段校验；
+# 置为 False 时回退为 model_validate 完整校验
+TRUSTED_DB_CONSTRUCT = True
+
+_MISSING = object()
+
+
+class LazyModel(BaseModel):
+    """首次校验/序列化时才构建 schema 的模型，用于不在路由签名中的少用模型
+
+    作为路由请求体或 response_model 的模型会在注册路由时被 FastAPI 构建，延迟无意义。
+    """
+    model_config = ConfigDict(defer_build=True)
+
+
+class ORMConstructMixin:
+    """为 from_attributes 响应模型提供跳过校验的快速构造
+
+    端点返回 model_construct 得到的实例时，FastAPI 按 response_model 处理不会再逐字段校验，
+    只做序列化；返回ORM对象或字典则会对每一行完整校验一遍
+    """
+
+    @classmethod
+    def _prepare_orm_data(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        """子类在此完成原本由 pre 校验器做的字段转换"""
+        return data
+
+    @classmethod
+    def from_orm_fast(cls, obj):
+        """从ORM对象构造响应模型，仅用于数据库读出的可信数据，请求体仍走 model_validate"""
+        if not TRUSTED_DB_CONSTRUCT:
+            return cls.model_validate(obj)
+        data = {}
+        for name in cls.model_fields:
+            value = getattr(obj, name, _MISSING)
+            if value is not _MISSING:
+                data[name] = value
+        return cls.model_construct(**cls._prepare_orm_data(data))
+
+
+def partial_model(
+    name: str,
+    base: Type[BaseModel],
+    *,
+    module: str,
+    doc: Optional[str] = None,
+    exclude: Iterable[str] = (),
+    **extra_fields: Any
+) -> Type[BaseModel]:
+    """
+    由已有模型生成所有字段可选、默认为 None 的更新模型，
+    沿用原字段的描述、约束和前置校验器，无需逐个重复声明
+    """
+    excluded = set(exclude)
+    fields: Dict[str, Any] = {}
+    for field_name, field in base.model_fields.items():
+        if field_name in excluded:
+            continue
+        info = copy(field)
+        info.default = None
+        info.default_factory = None
+        fields[field_name] = (Optional[field.annotation], info)
+    fields.update(extra_fields)
+    return create_model(name, __doc__=doc, __module__=module, **fields)
@@ -2,16 +2,22 @@
 """
 分类数据模型
 """
-from typing import List, Optional
+from typing import Annotated, List, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, StringConstraints
+from typing_extensions import TypedDict
+from app.schemas.base import ORMConstructMixin, partial_model
+
+# 十六进制颜色，模块级定义一次供各分类模型共用；校验通过后统一存为大写
+# （pydantic 先匹配 pattern 再做大小写转换，所以正则仍需接受小写输入）
+HexColor = Annotated[str, StringConstraints(to_upper=True, pattern=r"^#[0-9A-Fa-f]{6}$")]
 
 
 class CategoryBase(BaseModel):
     """分类基础模型"""
     name: str = Field(..., min_length=1, max_length=100, description="分类名称")
     description: Optional[str] = Field(None, max_length=500, description="分类描述")
-    color: Optional[str] = Field(None, pattern=r"^#[0-9A-Fa-f]{6}$", description="分类颜色（十六进制）")
+    color: Optional[HexColor] = Field(None, description="分类颜色（十六进制）")
     icon: Optional[str] = Field(None, max_length=50, description="分类图标")
     parent_id: Optional[int] = Field(None, description="父分类ID")
     sort_order: int = Field(0, ge=0, description="排序顺序")
@@ -19,18 +25,10 @@ class CategoryBase(BaseModel):
 
 class CategoryCreate(CategoryBase):
     """创建分类模型"""
-    pass
+    is_active: bool = Field(True, description="是否激活")
 
 
-class CategoryUpdate(BaseModel):
-    """更新分类模型"""
-    name: Optional[str] = Field(None, min_length=1, max_length=100, description="分类名称")
-    description: Optional[str] = Field(None, max_length=500, description="分类描述")
-    color: Optional[str] = Field(None, pattern=r"^#[0-9A-Fa-f]{6}$", description="分类颜色")
-    icon: Optional[str] = Field(None, max_length=50, description="分类图标")
-    parent_id: Optional[int] = Field(None, description="父分类ID")
-    sort_order: Optional[int] = Field(None, ge=0, description="排序顺序")
-    is_active: Optional[bool] = Field(None, description="是否激活")
+CategoryUpdate = partial_model("CategoryUpdate", CategoryCreate, module=__name__, doc="更新分类模型")
 
 
 class CategoryMove(BaseModel):
@@ -38,8 +36,15 @@ class CategoryMove(BaseModel):
     new_parent_id: Optional[int] = Field(None, description="新的父分类ID")
 
 
-class Category(CategoryBase):
+class Category(ORMConstructMixin, CategoryBase):
     """分类响应模型"""
+    # 响应按库中已有数据返回，不套用输入约束：旧的 /documents/categories 接口未做校验，
+    # 库里可能存在 "red"、"#fff" 这类颜色或超长名称，严格校验会让读取接口返回500
+    name: str
+    description: Optional[str] = None
+    color: Optional[str] = None
+    icon: Optional[str] = None
+    sort_order: int = 0
     id: int
     is_active: bool
     creator_id: Optional[int]
@@ -52,15 +57,14 @@ class Category(CategoryBase):
 
 
 class CategoryTree(Category):
-    """分类树形结构模型"""
-    children: List['CategoryTree'] = []
-    
-    class Config:
-        from_attributes = True
+    """分类树形结构模型（自引用在首次使用时解析，导入时不构建 schema）"""
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
+
+    children: List['CategoryTree'] = Field(default_factory=list)
 
 
-class CategoryStatistics(BaseModel):
-    """分类统计模型"""
+class CategoryStatistics(TypedDict):
+    """分类统计（TypedDict：接口返回的聚合字典直接按类型校验，不构造模型实例）"""
     categories: List[dict]
     uncategorized_count: int
     total_categories: int
@@ -76,7 +80,3 @@ class CategoryOption(BaseModel):
     
     class Config:
         from_attributes = True
-
-
-# 更新前向引用
-CategoryTree.model_rebuild()
\ No newline at end of file
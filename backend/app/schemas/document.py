@@ -1,40 +1,10 @@
 from pydantic import BaseModel
+from typing_extensions import TypedDict
 from typing import Optional, List, Any
 from datetime import datetime
-
-
-class CategoryBase(BaseModel):
-    name: str
-    description: Optional[str] = None
-    color: Optional[str] = None
-    icon: Optional[str] = None
-    parent_id: Optional[int] = None
-    sort_order: int = 0
-    is_active: bool = True
-
-
-class CategoryCreate(CategoryBase):
-    pass
-
-
-class CategoryUpdate(BaseModel):
-    name: Optional[str] = None
-    description: Optional[str] = None
-    color: Optional[str] = None
-    icon: Optional[str] = None
-    parent_id: Optional[int] = None
-    sort_order: Optional[int] = None
-    is_active: Optional[bool] = None
-
-
-class Category(CategoryBase):
-    id: int
-    creator_id: int
-    created_at: datetime
-    updated_at: Optional[datetime] = None
-
-    class Config:
-        from_attributes = True
+from app.schemas.base import LazyModel, ORMConstructMixin, partial_model
+# 分类模型统一使用 app.schemas.category 中的定义，嵌套校验器只构建一份
+from app.schemas.category import Category, CategoryCreate, CategoryUpdate
 
 
 class DocumentBase(BaseModel):
@@ -56,17 +26,10 @@ class DocumentCreate(DocumentBase):
     content_extracted: Optional[bool] = None
 
 
-class DocumentUpdate(BaseModel):
-    title: Optional[str] = None
-    description: Optional[str] = None
-    content: Optional[str] = None
-    category_id: Optional[int] = None
-    tags: Optional[List[str]] = None
-    status: Optional[str] = None
-    is_public: Optional[bool] = None
+DocumentUpdate = partial_model("DocumentUpdate", DocumentBase, module=__name__)
 
 
-class DocumentInDBBase(DocumentBase):
+class DocumentInDBBase(ORMConstructMixin, DocumentBase):
     id: int
     file_path: Optional[str] = None
     file_name: Optional[str] = None
@@ -95,6 +58,12 @@ class Document(DocumentInDBBase):
 class DocumentWithCategory(Document):
     category: Optional[Category] = None
 
+    @classmethod
+    def _prepare_orm_data(cls, data):
+        if data.get('category') is not None:
+            data['category'] = Category.from_orm_fast(data['category'])
+        return data
+
 
 class DocumentList(BaseModel):
     items: List[Document]
@@ -105,7 +74,7 @@ class DocumentList(BaseModel):
 
 
 # 搜索相关
-class SearchQuery(BaseModel):
+class SearchQuery(LazyModel):
     query: str
     category_id: Optional[int] = None
     tags: Optional[List[str]] = None
@@ -116,7 +85,7 @@ class SearchQuery(BaseModel):
     per_page: int = 20
 
 
-class SearchResult(BaseModel):
+class SearchResult(LazyModel):
     id: int
     title: str
     description: Optional[str] = None
@@ -128,7 +97,7 @@ class SearchResult(BaseModel):
     created_at: datetime
 
 
-class SearchResponse(BaseModel):
+class SearchResponse(LazyModel):
     results: List[SearchResult]
     total: int
     page: int
@@ -138,7 +107,7 @@ class SearchResponse(BaseModel):
 
 
 # 统计相关
-class DocumentStats(BaseModel):
+class DocumentStats(TypedDict):
     total_documents: int
     published_documents: int
     draft_documents: int
@@ -147,7 +116,7 @@ class DocumentStats(BaseModel):
     total_downloads: int
 
 
-class CategoryStats(BaseModel):
+class CategoryStats(LazyModel):
     category_id: int
     category_name: str
     document_count: int
@@ -155,9 +124,9 @@ class CategoryStats(BaseModel):
     total_downloads: int
 
 
-class PopularDocument(BaseModel):
+class PopularDocument(LazyModel):
     id: int
     title: str
     view_count: int
     download_count: int
-    category_name: Optional[str] = None
\ No newline at end of file
+    category_name: Optional[str] = None
@@ -3,7 +3,10 @@
 移动端API数据模型
 专为移动应用优化的简化数据结构
 """
-from typing import List, Optional, Dict, Any
+import re
+import time
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Mapping
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -83,8 +86,9 @@ class MobileAsset(BaseModel):
 class MobileAssetDetail(MobileAsset):
     """移动端资产详情"""
     description: Optional[str] = None
-    specifications: Dict[str, Any] = {}  # 技术规格
-    maintenance_info: Dict[str, Any] = {}  # 维护信息
+    # 规格、维护信息均为“显示名称 -> 文本”，按字符串字典声明，序列化走同构字典的快速路径
+    specifications: Dict[str, str] = {}  # 技术规格
+    maintenance_info: Dict[str, str] = {}  # 维护信息
     related_documents: List[Dict[str, Any]] = []  # 相关文档
 
 
@@ -169,28 +173,40 @@ class MobileRefreshTokenRequest(BaseModel):
 
 
 # 辅助函数
+_HTML_TAG_RE = re.compile(r'<[^>]+>')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+_SIZE_NAMES = ("B", "KB", "MB", "GB", "TB")
+
+
 def format_file_size(size_bytes: int) -> str:
     """格式化文件大小显示"""
-    if size_bytes == 0:
+    if size_bytes <= 0:
         return "0B"
-    size_names = ["B", "KB", "MB", "GB"]
-    import math
-    i = int(math.floor(math.log(size_bytes, 1024)))
-    p = math.pow(1024, i)
-    s = round(size_bytes / p, 2)
-    return f"{s}{size_names[i]}"
+    # 以二进制位数确定单位，避免浮点对数运算
+    i = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_NAMES) - 1)
+    s = round(size_bytes / (1 << (10 * i)), 2)
+    return f"{s}{_SIZE_NAMES[i]}"
+
+
+# 状态显示信息为只读常量，返回共享引用，调用方不要修改
+_STATUS_DISPLAY_MAP = MappingProxyType({
+    "active": MappingProxyType({"display": "运行中", "icon": "check_circle", "color": "#00C851"}),
+    "inactive": MappingProxyType({"display": "已停用", "icon": "cancel", "color": "#6c757d"}),
+    "maintenance": MappingProxyType({"display": "维护中", "icon": "build", "color": "#ff8800"}),
+    "error": MappingProxyType({"display": "异常", "icon": "error", "color": "#dc3545"}),
+    "retired": MappingProxyType({"display": "已退役", "icon": "archive", "color": "#6f42c1"}),
+})
+_UNKNOWN_STATUS_DISPLAY = {"icon": "help", "color": "#6c757d"}
 
 
-def get_status_display_info(status: str) -> Dict[str, str]:
+def get_status_display_info(status: str) -> Mapping[str, str]:
     """获取状态显示信息"""
-    status_map = {
-        "active": {"display": "运行中", "icon": "check_circle", "color": "#00C851"},
-        "inactive": {"display": "已停用", "icon": "cancel", "color": "#6c757d"},
-        "maintenance": {"display": "维护中", "icon": "build", "color": "#ff8800"},
-        "error": {"display": "异常", "icon": "error", "color": "#dc3545"},
-        "retired": {"display": "已退役", "icon": "archive", "color": "#6f42c1"}
-    }
-    return status_map.get(status, {"display": status, "icon": "help", "color": "#6c757d"})
+    info = _STATUS_DISPLAY_MAP.get(status)
+    if info is not None:
+        return info
+    return {"display": status, **_UNKNOWN_STATUS_DISPLAY}
 
 
 def generate_summary(content: str, max_length: int = 200) -> str:
@@ -198,24 +214,44 @@ def generate_summary(content: str, max_length: int = 200) -> str:
     if not content:
         return ""
     # 简单的摘要生成，实际可以集成更复杂的NLP算法
-    import re
     # 清理HTML标签和多余空白
-    clean_content = re.sub(r'<[^>]+>', '', content)
-    clean_content = re.sub(r'\s+', ' ', clean_content).strip()
+    clean_content = _HTML_TAG_RE.sub('', content)
+    clean_content = _WHITESPACE_RE.sub(' ', clean_content).strip()
     
     if len(clean_content) <= max_length:
         return clean_content
     
-    # 尝试在句号处截断
-    sentences = clean_content.split('。')
-    summary = ""
-    for sentence in sentences:
-        if len(summary + sentence + "。") <= max_length:
-            summary += sentence + "。"
-        else:
+    # 尝试在句号处截断：累计长度判断，最后一次性拼接
+    parts = []
+    total = 0
+    for sentence in clean_content.split('。'):
+        segment_length = len(sentence) + 1
+        if total + segment_length > max_length:
             break
+        parts.append(sentence)
+        total += segment_length
     
-    if not summary:
-        summary = clean_content[:max_length] + "..."
+    if not parts:
+        return clean_content[:max_length] + "..."
     
-    return summary
\ No newline at end of file
+    return "。".join(parts) + "。"
+
+
+def build_pagination(page: int, size: int, total: int) -> MobilePaginationInfo:
+    """构建分页信息（字段由服务端计算，跳过校验直接构造）"""
+    return MobilePaginationInfo.model_construct(
+        page=page,
+        size=size,
+        total=total,
+        has_next=page * size < total,
+        has_prev=page > 1
+    )
+
+
+def build_meta(start_time: float, cached: bool = False) -> MobileMetaInfo:
+    """构建响应元信息，start_time 为请求开始时的 time.time()"""
+    return MobileMetaInfo.model_construct(
+        cached=cached,
+        response_time=f"{(time.time() - start_time) * 1000:.0f}ms",
+        server_time=datetime.utcnow().isoformat() + "Z"
+    )
@@ -1,11 +1,17 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, StringConstraints
+from typing import Annotated, Optional
 from datetime import datetime
+from app.schemas.base import partial_model
+
+# 邮箱格式只做宽松的正则校验（在 pydantic-core 内完成），不能比 EmailStr 更严格，
+# 以免拒绝国际化域名等注册时已通过的地址；完整的 EmailStr 校验仅用于注册
+_EMAIL_RE = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+Email = Annotated[str, StringConstraints(strip_whitespace=True, pattern=_EMAIL_RE)]
 
 
 class UserBase(BaseModel):
     username: str
-    email: EmailStr
+    email: Email
     full_name: Optional[str] = None
     department: Optional[str] = None
     position: Optional[str] = None
@@ -14,19 +20,15 @@ class UserBase(BaseModel):
 
 
 class UserCreate(UserBase):
+    email: EmailStr
     password: str
     is_superuser: bool = False
 
 
-class UserUpdate(BaseModel):
-    username: Optional[str] = None
-    email: Optional[EmailStr] = None
-    full_name: Optional[str] = None
-    department: Optional[str] = None
-    position: Optional[str] = None
-    phone: Optional[str] = None
-    is_active: Optional[bool] = None
-    avatar_url: Optional[str] = None
+UserUpdate = partial_model(
+    "UserUpdate", UserBase, module=__name__,
+    avatar_url=(Optional[str], None)
+)
 
 
 class UserInDBBase(UserBase):
@@ -69,7 +71,7 @@ class PasswordReset(BaseModel):
 
 
 class PasswordResetRequest(BaseModel):
-    email: EmailStr
+    email: Email
 
 
 class PasswordChange(BaseModel):
@@ -3,13 +3,24 @@
 语音查询API数据模型
 支持自然语言查询的数据结构定义
 """
-from typing import List, Optional, Dict, Any, Union
+import heapq
+import re
+from operator import itemgetter
+from types import MappingProxyType
+from typing import List, Optional, Dict, Any, Mapping, Union
 from pydantic import BaseModel
 from datetime import datetime
 
+# 有效查询字符：中文、英文字母或数字
+_VALID_CHAR_RE = re.compile(r'[\u4e00-\u9fff]|[a-zA-Z0-9]')
+
 
 class VoiceBaseResponse(BaseModel):
-    """语音API统一响应基类"""
+    """语音API统一响应基类
+
+    响应内容均由服务端生成，端点用 model_construct 组装；FastAPI 对 response_model
+    类型的已构造实例只做序列化、不再逐字段校验（与文档/资产列表接口的处理一致）
+    """
     success: bool = True
     code: int = 200
     message: str = "请求成功"
@@ -147,13 +158,23 @@ class VoiceAnalyticsResponse(VoiceBaseResponse):
 
 # ============= 辅助函数 =============
 
-def format_unified_results(documents: List[Dict], assets: List[Dict], query: str) -> List[VoiceSearchResultItem]:
-    """将文档和资产结果统一格式化"""
+# 结果字典按相关性排序的键
+_relevance_key = itemgetter("relevance_score")
+
+
+def format_unified_results(documents: List[Dict], assets: List[Dict], query: str,
+                           limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    将文档和资产结果统一格式化，指定 limit 时只返回相关性最高的前 limit 条
+
+    返回与 VoiceSearchResultItem 字段一致的字典（同 convert_search_results_to_voice_format），
+    只在外层 VoiceQueryResult 校验一次，不逐条构造模型
+    """
     unified_results = []
     
     # 处理文档结果
     for doc in documents:
-        result_item = VoiceSearchResultItem(
+        result_item = dict(
             id=doc["id"],
             title=doc["title"],
             type="document",
@@ -174,7 +195,7 @@ def format_unified_results(documents: List[Dict], assets: List[Dict], query: str
     for asset in assets:
         status_info = get_asset_status_display(asset.get("status", "unknown"))
         
-        result_item = VoiceSearchResultItem(
+        result_item = dict(
             id=asset["id"],
             title=asset["name"],
             type="asset",
@@ -195,48 +216,62 @@ def format_unified_results(documents: List[Dict], assets: List[Dict], query: str
         )
         unified_results.append(result_item)
     
-    # 按相关性排序
-    unified_results.sort(key=lambda x: x.relevance_score, reverse=True)
+    # 按相关性排序；结果远多于 limit 时用堆只取前 limit 条，避免整体排序
+    if limit is not None and len(unified_results) > 2 * limit:
+        return heapq.nlargest(limit, unified_results, key=_relevance_key)
+    
+    unified_results.sort(key=_relevance_key, reverse=True)
     
-    return unified_results
+    return unified_results if limit is None else unified_results[:limit]
+
+
+_SIZE_NAMES = ("B", "KB", "MB", "GB")
 
 
 def format_file_size(size_bytes: int) -> str:
     """格式化文件大小显示"""
-    if size_bytes == 0:
+    if size_bytes <= 0:
         return "0B"
-    size_names = ["B", "KB", "MB", "GB"]
-    import math
-    i = int(math.floor(math.log(size_bytes, 1024)))
-    p = math.pow(1024, i)
-    s = round(size_bytes / p, 2)
-    return f"{s}{size_names[i]}"
+    # 以二进制位数确定单位，避免浮点对数运算
+    i = min((size_bytes.bit_length() - 1) // 10, len(_SIZE_NAMES) - 1)
+    s = round(size_bytes / (1 << (10 * i)), 2)
+    return f"{s}{_SIZE_NAMES[i]}"
+
 
+# 资产状态显示信息为只读常量，返回共享引用，调用方不要修改
+_ASSET_STATUS_MAP = MappingProxyType({
+    "active": MappingProxyType({"display": "运行中", "icon": "check_circle", "color": "#00C851"}),
+    "inactive": MappingProxyType({"display": "已停用", "icon": "cancel", "color": "#6c757d"}),
+    "maintenance": MappingProxyType({"display": "维护中", "icon": "build", "color": "#ff8800"}),
+    "error": MappingProxyType({"display": "异常", "icon": "error", "color": "#dc3545"}),
+    "retired": MappingProxyType({"display": "已退役", "icon": "archive", "color": "#6f42c1"})
+})
 
-def get_asset_status_display(status: str) -> Dict[str, str]:
+
+def get_asset_status_display(status: str) -> Mapping[str, str]:
     """获取资产状态显示信息"""
-    status_map = {
-        "active": {"display": "运行中", "icon": "check_circle", "color": "#00C851"},
-        "inactive": {"display": "已停用", "icon": "cancel", "color": "#6c757d"},
-        "maintenance": {"display": "维护中", "icon": "build", "color": "#ff8800"},
-        "error": {"display": "异常", "icon": "error", "color": "#dc3545"},
-        "retired": {"display": "已退役", "icon": "archive", "color": "#6f42c1"}
-    }
-    return status_map.get(status, {"display": status, "icon": "help", "color": "#6c757d"})
+    info = _ASSET_STATUS_MAP.get(status)
+    if info is not None:
+        return info
+    return {"display": status, "icon": "help", "color": "#6c757d"}
 
 
-def calculate_query_statistics(results: List[VoiceSearchResultItem]) -> VoiceStatistics:
+def calculate_query_statistics(results: List[Dict[str, Any]]) -> VoiceStatistics:
     """计算查询统计信息"""
-    documents_count = sum(1 for r in results if r.type == "document")
-    assets_count = sum(1 for r in results if r.type == "asset")
+    # 一次遍历完成分类计数和相关性求和
+    documents_count = assets_count = 0
+    relevance_sum = 0.0
+    for r in results:
+        if r["type"] == "document":
+            documents_count += 1
+        elif r["type"] == "asset":
+            assets_count += 1
+        relevance_sum += r["relevance_score"]
     
-    if results:
-        avg_relevance = sum(r.relevance_score for r in results) / len(results)
-    else:
-        avg_relevance = 0.0
+    total_results = len(results)
+    avg_relevance = relevance_sum / total_results if total_results else 0.0
     
     # 判断搜索覆盖度
-    total_results = len(results)
     if total_results >= 10:
         coverage = "high"
     elif total_results >= 5:
@@ -253,35 +288,48 @@ def calculate_query_statistics(results: List[VoiceSearchResultItem]) -> VoiceSta
     )
 
 
+# 相关查询模板：关键词前后缀，以及按查询类型的固定建议
+_RELATED_KEYWORD_TEMPLATES = (("查找", "的详细信息"), ("显示", "相关资源"))
+_RELATED_TYPE_QUERIES = {
+    "documents": ("最近更新的文档", "热门文档排行"),
+    "assets": ("设备健康状况", "资产维护计划"),
+}
+_MAX_RELATED_QUERIES = 5
+
+
 def generate_related_queries(original_query: str, intent: VoiceQueryIntent) -> List[str]:
     """生成相关查询建议"""
     related = []
     
-    # 基于关键词生成相关查询
+    # 基于关键词生成相关查询，凑够数量后不再继续
     for keyword in intent.keywords[:3]:  # 取前3个关键词
         if keyword != original_query:
-            related.append(f"查找{keyword}的详细信息")
-            related.append(f"显示{keyword}相关资源")
+            for prefix, suffix in _RELATED_KEYWORD_TEMPLATES:
+                related.append(prefix + keyword + suffix)
+            if len(related) >= _MAX_RELATED_QUERIES:
+                return related[:_MAX_RELATED_QUERIES]
     
     # 基于查询类型生成相关查询
-    if intent.query_type == "documents":
-        related.append("最近更新的文档")
-        related.append("热门文档排行")
-    elif intent.query_type == "assets":
-        related.append("设备健康状况")
-        related.append("资产维护计划")
+    related.extend(_RELATED_TYPE_QUERIES.get(intent.query_type, ()))
     
-    return related[:5]
+    return related[:_MAX_RELATED_QUERIES]
+
+
+# 查询上下文中的时间、状态提示词（子串匹配）
+_TIME_WORDS = ("今天", "昨天", "本周", "最近")
+_STATUS_WORDS = ("正常", "异常", "维护", "故障")
 
 
 def extract_query_context(query_text: str, user_context: Optional[Dict] = None) -> Dict[str, Any]:
     """提取查询上下文信息"""
+    lowered = query_text.lower()
+    word_count = len(query_text.split())
     context = {
         "query_length": len(query_text),
-        "word_count": len(query_text.split()),
-        "has_time_reference": any(word in query_text.lower() for word in ["今天", "昨天", "本周", "最近"]),
-        "has_status_reference": any(word in query_text.lower() for word in ["正常", "异常", "维护", "故障"]),
-        "query_complexity": "simple" if len(query_text.split()) <= 3 else "complex"
+        "word_count": word_count,
+        "has_time_reference": any(word in lowered for word in _TIME_WORDS),
+        "has_status_reference": any(word in lowered for word in _STATUS_WORDS),
+        "query_complexity": "simple" if word_count <= 3 else "complex"
     }
     
     if user_context:
@@ -290,15 +338,19 @@ def extract_query_context(query_text: str, user_context: Optional[Dict] = None)
     return context
 
 
-def build_search_summary(results: List[VoiceSearchResultItem], query: str) -> str:
+def build_search_summary(results: List[Dict[str, Any]], query: str) -> str:
     """构建搜索结果摘要"""
     total = len(results)
-    documents = sum(1 for r in results if r.type == "document")
-    assets = sum(1 for r in results if r.type == "asset")
-    
     if total == 0:
         return f"未找到与'{query}'相关的结果"
     
+    documents = assets = 0
+    for r in results:
+        if r["type"] == "document":
+            documents += 1
+        elif r["type"] == "asset":
+            assets += 1
+    
     summary_parts = []
     
     if documents > 0:
@@ -312,7 +364,7 @@ def build_search_summary(results: List[VoiceSearchResultItem], query: str) -> st
     # 添加最相关结果的预览
     if results:
         top_result = results[0]
-        summary += f"，最相关的是：{top_result.title}"
+        summary += f"，最相关的是：{top_result['title']}"
     
     return summary
 
@@ -335,9 +387,12 @@ def validate_voice_query(query_text: str) -> Dict[str, Any]:
         validation["issues"].append("查询过长")
         validation["suggestions"].append("请简化查询内容")
     
+    # 纯ASCII字母数字的查询必然包含有效字符，无需再做正则扫描
+    if query_text.isascii() and query_text.strip().isalnum():
+        return validation
+    
     # 检查是否包含有效关键词
-    import re
-    if not re.search(r'[\u4e00-\u9fff]|[a-zA-Z0-9]', query_text):
+    if not _VALID_CHAR_RE.search(query_text):
         validation["is_valid"] = False
         validation["issues"].append("查询不包含有效字符")
         validation["suggestions"].append("请输入中文或英文查询")
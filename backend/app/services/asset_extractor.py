@@ -6,20 +6,99 @@ import pandas as pd
 from io import StringIO, BytesIO
 from typing import List, Dict, Any, Optional, Tuple
 from difflib import SequenceMatcher
-import ipaddress
+import socket
 from pathlib import Path
 
+try:
+    import re2  # google-re2：线性时间匹配，可选
+except ImportError:
+    re2 = None
+
+
+def _compile_scan(pattern: str):
+    """编译逐行扫描IP/MAC/主机名的高频模式，优先使用RE2，未安装时回退到标准库re
+    
+    RE2的\\b只把ASCII字母数字视为单词字符，标准库re加re.ASCII保持一致，
+    使"地址192.168.1.1"这类紧邻中文的IP无论是否安装RE2都能识别。
+    """
+    return re2.compile(pattern) if re2 is not None else re.compile(pattern, re.ASCII)
+
+
+try:
+    import python_calamine  # noqa: F401  Rust实现的Excel解析器，可选（需pandas>=2.2）
+    _EXCEL_ENGINE = 'calamine'
+except ImportError:
+    _EXCEL_ENGINE = None
+
 from app.models.asset import AssetType, AssetStatus
 from app.schemas.asset import AssetCreate
 
+# 无需特殊处理的标准字段 -> 资产字段
+_FIELD_TARGETS = {
+    'hostname': 'hostname',
+    'username': 'username',
+    'password': 'password',
+    'os': 'os_version',
+    'location': 'location',
+    'owner': 'owner',
+    'department': 'department',
+    'environment': 'environment',
+    'service': 'service_name',
+    'model': 'model',
+    'manufacturer': 'manufacturer',
+    'serial': 'serial_number',
+    'cpu': 'cpu',
+    'memory': 'memory',
+    'storage': 'storage',
+    'notes': 'notes'
+}
+
 
 class AssetExtractor:
     """设备资产信息提取器"""
     
     def __init__(self):
-        self.ip_pattern = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
-        self.mac_pattern = re.compile(r'\b[0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}\b')
-        self.hostname_pattern = re.compile(r'[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*')
+        self.ip_pattern = _compile_scan(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
+        self.mac_pattern = _compile_scan(r'\b[0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}\b')
+        self.hostname_pattern = _compile_scan(r'[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*')
+        self.port_pattern = re.compile(r':(\d{1,5})\b')
+        
+        # 逐行提取的字段模式（匹配小写文本），同一字段内按优先级排列
+        self.line_field_patterns = {field: [re.compile(p) for p in patterns] for field, patterns in {
+            'username': (
+                r'user[:\s=]+(\w+)',
+                r'用户[:\s=]+(\w+)',
+                r'username[:\s=]+(\w+)',
+                r'login[:\s=]+(\w+)'
+            ),
+            'owner': (
+                r'负责人[:\s=]+([^\s,，]+)',
+                r'管理员[:\s=]+([^\s,，]+)',
+                r'owner[:\s=]+([^\s,，]+)',
+                r'admin[:\s=]+([^\s,，]+)'
+            ),
+            'department': (
+                r'部门[:\s=]+([^\s,，]+)',
+                r'科室[:\s=]+([^\s,，]+)',
+                r'department[:\s=]+([^\s,，]+)',
+                r'dept[:\s=]+([^\s,，]+)'
+            ),
+            'environment': (
+                r'环境[:\s=]+([^\s,，]+)',
+                r'environment[:\s=]+([^\s,，]+)',
+                r'env[:\s=]+([^\s,，]+)'
+            ),
+            'location': (
+                r'位置[:\s=]+([^\s,，]+)',
+                r'机房[:\s=]+([^\s,，]+)',
+                r'location[:\s=]+([^\s,，]+)',
+                r'datacenter[:\s=]+([^\s,，]+)'
+            ),
+        }.items()}
+        self.os_version_patterns = [
+            (os_name, re.compile(f'{os_name}[\\s]*([\\d\\.]+)'))
+            for os_name in ('windows', 'linux', 'centos', 'ubuntu', 'redhat', 'debian', 'suse')
+        ]
         
         # 常见的字段映射关系
         self.field_mappings = {
@@ -44,6 +123,12 @@ class AssetExtractor:
             'mac': ['mac', 'mac_address', 'mac地址', 'MAC地址', 'MAC'],
             'notes': ['notes', 'note', '备注', '说明', 'description', 'remark']
         }
+        
+        # 小写别名 -> [(标准字段, 别名优先级)]，同一别名可对应多个标准字段（如host）
+        self.alias_index: Dict[str, List[Tuple[str, int]]] = {}
+        for standard_field, possible_names in self.field_mappings.items():
+            for priority, name in enumerate(possible_names):
+                self.alias_index.setdefault(name.lower(), []).append((standard_field, priority))
     
     def extract_from_file(self, file_path: str, file_content: bytes, file_type: str) -> List[Dict[str, Any]]:
         """从文件中提取资产信息"""
@@ -70,8 +155,8 @@ class AssetExtractor:
     def _extract_from_csv(self, content: bytes) -> List[Dict[str, Any]]:
         """从CSV文件提取资产信息"""
         try:
-            # 尝试不同的编码
-            for encoding in ['utf-8', 'gbk', 'gb2312']:
+            # 尝试不同的编码（utf-8-sig兼容无BOM的UTF-8，GBK是GB2312的超集）
+            for encoding in ('utf-8-sig', 'gbk'):
                 try:
                     text_content = content.decode(encoding)
                     break
@@ -80,15 +165,11 @@ class AssetExtractor:
             else:
                 return []
             
-            csv_file = StringIO(text_content)
-            reader = csv.DictReader(csv_file)
             assets = []
-            
-            for row in reader:
+            for row in csv.DictReader(StringIO(text_content)):
                 asset_data = self._map_fields(row)
                 if asset_data and (asset_data.get('ip_address') or asset_data.get('hostname')):
                     assets.append(asset_data)
-            
             return assets
         except Exception as e:
             print(f"CSV解析错误: {str(e)}")
@@ -97,16 +178,19 @@ class AssetExtractor:
     def _extract_from_excel(self, content: bytes) -> List[Dict[str, Any]]:
         """从Excel文件提取资产信息"""
         try:
-            excel_file = BytesIO(content)
-            df = pd.read_excel(excel_file, engine='openpyxl')
+            try:
+                df = pd.read_excel(BytesIO(content), engine=_EXCEL_ENGINE or 'openpyxl')
+            except Exception:
+                if not _EXCEL_ENGINE:
+                    raise
+                # calamine不可用（如pandas版本过低）时回退到openpyxl
+                df = pd.read_excel(BytesIO(content), engine='openpyxl')
             
             assets = []
-            for _, row in df.iterrows():
-                row_dict = row.to_dict()
+            for row_dict in df.to_dict('records'):
                 asset_data = self._map_fields(row_dict)
                 if asset_data and (asset_data.get('ip_address') or asset_data.get('hostname')):
                     assets.append(asset_data)
-            
             return assets
         except Exception as e:
             print(f"Excel解析错误: {str(e)}")
@@ -310,68 +394,25 @@ class AssetExtractor:
             asset_data['mac_address'] = mac_matches[0]
         
         # 提取端口号
-        port_match = re.search(r':(\d{1,5})\b', line)
+        port_match = self.port_pattern.search(line)
         if port_match and not asset_data.get('port'):
             port = int(port_match.group(1))
             if 1 <= port <= 65535:
                 asset_data['port'] = port
         
-        # 提取用户名
-        username_patterns = [
-            r'user[:\s=]+(\w+)',
-            r'用户[:\s=]+(\w+)',
-            r'username[:\s=]+(\w+)',
-            r'login[:\s=]+(\w+)'
-        ]
-        if not asset_data.get('username'):
-            for pattern in username_patterns:
-                match = re.search(pattern, line_lower)
-                if match:
-                    asset_data['username'] = match.group(1)
-                    break
-        
-        # 提取负责人/管理员
-        owner_patterns = [
-            r'负责人[:\s=]+([^\s,，]+)',
-            r'管理员[:\s=]+([^\s,，]+)',
-            r'owner[:\s=]+([^\s,，]+)',
-            r'admin[:\s=]+([^\s,，]+)'
-        ]
-        if not asset_data.get('owner'):
-            for pattern in owner_patterns:
-                match = re.search(pattern, line_lower)
-                if match:
-                    asset_data['owner'] = match.group(1)
-                    break
-        
-        # 提取部门信息
-        dept_patterns = [
-            r'部门[:\s=]+([^\s,，]+)',
-            r'科室[:\s=]+([^\s,，]+)', 
-            r'department[:\s=]+([^\s,，]+)',
-            r'dept[:\s=]+([^\s,，]+)'
-        ]
-        if not asset_data.get('department'):
-            for pattern in dept_patterns:
-                match = re.search(pattern, line_lower)
+        # 提取用户名、负责人、部门、环境、位置：每个字段按优先级取第一个命中的模式
+        env_missing = not asset_data.get('environment')
+        for field, patterns in self.line_field_patterns.items():
+            if asset_data.get(field):
+                continue
+            for pattern in patterns:
+                match = pattern.search(line_lower)
                 if match:
-                    asset_data['department'] = match.group(1)
+                    asset_data[field] = match.group(1)
                     break
         
-        # 提取环境信息
-        env_patterns = [
-            r'环境[:\s=]+([^\s,，]+)',
-            r'environment[:\s=]+([^\s,，]+)',
-            r'env[:\s=]+([^\s,，]+)'
-        ]
-        if not asset_data.get('environment'):
-            for pattern in env_patterns:
-                match = re.search(pattern, line_lower)
-                if match:
-                    asset_data['environment'] = match.group(1)
-                    break
-            
-            # 如果没有明确的环境信息，通过关键词推断
+        # 如果没有明确的环境信息，通过关键词推断
+        if env_missing:
             if '生产' in line or 'prod' in line_lower:
                 asset_data['environment'] = '生产'
             elif '测试' in line or 'test' in line_lower:
@@ -379,20 +420,6 @@ class AssetExtractor:
             elif '开发' in line or 'dev' in line_lower:
                 asset_data['environment'] = '开发'
         
-        # 提取位置信息
-        location_patterns = [
-            r'位置[:\s=]+([^\s,，]+)',
-            r'机房[:\s=]+([^\s,，]+)',
-            r'location[:\s=]+([^\s,，]+)',
-            r'datacenter[:\s=]+([^\s,，]+)'
-        ]
-        if not asset_data.get('location'):
-            for pattern in location_patterns:
-                match = re.search(pattern, line_lower)
-                if match:
-                    asset_data['location'] = match.group(1)
-                    break
-        
         # 尝试识别设备类型关键词
         if not asset_data.get('asset_type') or asset_data.get('asset_type') == AssetType.SERVER:
             if any(word in line_lower for word in ['switch', '交换机']):
@@ -409,12 +436,11 @@ class AssetExtractor:
                 asset_data['asset_type'] = AssetType.SERVER
         
         # 提取操作系统信息
-        os_keywords = ['windows', 'linux', 'centos', 'ubuntu', 'redhat', 'debian', 'suse']
         if not asset_data.get('os_version'):
-            for os_name in os_keywords:
+            for os_name, version_pattern in self.os_version_patterns:
                 if os_name in line_lower:
                     # 尝试提取版本号
-                    version_match = re.search(f'{os_name}[\\s]*([\\d\\.]+)', line_lower)
+                    version_match = version_pattern.search(line_lower)
                     if version_match:
                         asset_data['os_version'] = f"{os_name.capitalize()} {version_match.group(1)}"
                     else:
@@ -428,54 +454,42 @@ class AssetExtractor:
         # 清理数据
         cleaned_data = {}
         for key, value in row_data.items():
-            if pd.notna(value) and str(value).strip():
-                cleaned_data[str(key).strip().lower()] = str(value).strip()
-        
-        # 字段映射
-        for standard_field, possible_names in self.field_mappings.items():
-            for name in possible_names:
-                if name.lower() in cleaned_data:
-                    value = cleaned_data[name.lower()]
-                    if value and value != 'nan':
-                        # 特殊处理
-                        if standard_field == 'ip':
-                            if self._is_valid_ip(value):
-                                asset_data['ip_address'] = value
-                        elif standard_field == 'port':
-                            try:
-                                port = int(float(value))
-                                if 1 <= port <= 65535:
-                                    asset_data['port'] = port
-                            except (ValueError, TypeError):
-                                pass
-                        elif standard_field == 'type':
-                            asset_data['asset_type'] = self._infer_asset_type(value)
-                        elif standard_field == 'mac':
-                            if self._is_valid_mac(value):
-                                asset_data['mac_address'] = value
-                        else:
-                            # 映射到对应字段
-                            field_map = {
-                                'hostname': 'hostname',
-                                'username': 'username',
-                                'password': 'password',
-                                'os': 'os_version',
-                                'location': 'location',
-                                'owner': 'owner',
-                                'department': 'department',
-                                'environment': 'environment',
-                                'service': 'service_name',
-                                'model': 'model',
-                                'manufacturer': 'manufacturer',
-                                'serial': 'serial_number',
-                                'cpu': 'cpu',
-                                'memory': 'memory',
-                                'storage': 'storage',
-                                'notes': 'notes'
-                            }
-                            if standard_field in field_map:
-                                asset_data[field_map[standard_field]] = value
-                    break
+            # 跳过None和NaN（NaN不等于自身），列表等非标量值也能安全判断
+            if value is None or value != value:
+                continue
+            text = str(value).strip()
+            if text:
+                cleaned_data[str(key).strip().lower()] = text
+        
+        # 字段映射：每个标准字段取优先级最高的别名
+        matched: Dict[str, Tuple[int, str]] = {}
+        for key, value in cleaned_data.items():
+            for standard_field, priority in self.alias_index.get(key, ()):
+                if standard_field not in matched or priority < matched[standard_field][0]:
+                    matched[standard_field] = (priority, value)
+        
+        for standard_field, (_, value) in matched.items():
+            if value == 'nan':
+                continue
+            # 特殊处理
+            if standard_field == 'ip':
+                if self._is_valid_ip(value):
+                    asset_data['ip_address'] = value
+            elif standard_field == 'port':
+                try:
+                    port = int(float(value))
+                    if 1 <= port <= 65535:
+                        asset_data['port'] = port
+                except (ValueError, TypeError):
+                    pass
+            elif standard_field == 'type':
+                asset_data['asset_type'] = self._infer_asset_type(value)
+            elif standard_field == 'mac':
+                if self._is_valid_mac(value):
+                    asset_data['mac_address'] = value
+            elif standard_field in _FIELD_TARGETS:
+                # 映射到对应字段
+                asset_data[_FIELD_TARGETS[standard_field]] = value
         
         # 设置默认值
         if 'ip_address' in asset_data or 'hostname' in asset_data:
@@ -487,11 +501,22 @@ class AssetExtractor:
         return None
     
     def _is_valid_ip(self, ip_str: str) -> bool:
-        """验证IP地址格式"""
+        """验证IP地址格式（inet_pton在C层解析，不创建地址对象）"""
+        if not isinstance(ip_str, str):
+            return False
+        try:
+            socket.inet_pton(socket.AF_INET, ip_str)
+            return True
+        except (OSError, ValueError):
+            pass
+        # IPv6可带%scope后缀（如fe80::1%eth0），inet_pton不接受，去掉后再校验
+        address, sep, scope = ip_str.partition('%')
+        if sep and (not scope or '%' in scope):
+            return False
         try:
-            ipaddress.ip_address(ip_str)
+            socket.inet_pton(socket.AF_INET6, address)
             return True
-        except ValueError:
+        except (OSError, ValueError):
             return False
     
     def _is_valid_mac(self, mac_str: str) -> bool:
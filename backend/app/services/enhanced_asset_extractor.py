@@ -6,14 +6,46 @@
 import re
 import csv
 import json
+import numpy as np
 import pandas as pd
 from io import StringIO, BytesIO
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from difflib import SequenceMatcher
-import ipaddress
+import socket
 from pathlib import Path
 import logging
 
+try:
+    import re2  # google-re2：线性时间匹配，可选
+except ImportError:
+    re2 = None
+
+
+def _compile_scan(pattern: str):
+    """编译逐行扫描IP/MAC/主机名的高频模式，优先使用RE2，未安装时回退到标准库re
+    
+    RE2的\\b只把ASCII字母数字视为单词字符，标准库re加re.ASCII保持一致，
+    使"地址192.168.1.1"这类紧邻中文的IP无论是否安装RE2都能识别。
+    """
+    return re2.compile(pattern) if re2 is not None else re.compile(pattern, re.ASCII)
+
+
+try:
+    import python_calamine  # noqa: F401  Rust实现的Excel解析器，可选（需pandas>=2.2）
+    _EXCEL_ENGINE = 'calamine'
+except ImportError:
+    _EXCEL_ENGINE = None
+
+try:
+    from rapidfuzz import fuzz, process  # C++实现的字符串相似度，可选
+except ImportError:
+    fuzz = process = None
+
+try:
+    import ahocorasick  # pyahocorasick：多关键词单次扫描，可选
+except ImportError:
+    ahocorasick = None
+
 # 尝试导入，如果失败则使用字符串常量
 try:
     from app.models.asset import AssetType, AssetStatus, NetworkLocation
@@ -56,14 +88,83 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 资产相似度计算的关键字段权重
+_SIMILARITY_WEIGHTS = {
+    'ip_address': 30,
+    'hostname': 25,
+    'mac_address': 20,
+    'serial_number': 15,
+    'name': 10
+}
+
+# 分块计算相似度时每块的单元数上限
+_SIMILARITY_BLOCK_CELLS = 1 << 20
+
+# 视为空值的单元格文本（小写）
+_EMPTY_CELL_VALUES = frozenset(('nan', 'null', 'none'))
+
+
+def _similarity_value(asset: Dict[str, Any], field: str) -> str:
+    """取参与相似度比较的字段值，JSON中的数字等非字符串值按字符串比较"""
+    value = asset.get(field)
+    return str(value).lower().strip() if value else ''
+
+
+class _KeywordMatcher:
+    """按优先级分组的多关键词子串匹配，安装pyahocorasick时每段文本只扫描一遍"""
+    
+    def __init__(self, groups: List[Tuple[Any, Tuple[str, ...]]]):
+        self.groups = groups
+        self.automaton = None
+        if ahocorasick is not None:
+            priorities: Dict[str, int] = {}
+            for priority, (_, keywords) in enumerate(groups):
+                for keyword in keywords:
+                    priorities.setdefault(keyword, priority)
+            self.automaton = ahocorasick.Automaton()
+            for keyword, priority in priorities.items():
+                self.automaton.add_word(keyword, priority)
+            self.automaton.make_automaton()
+    
+    def first(self, text: str) -> Any:
+        """返回文本命中的优先级最高的分组值，未命中返回None"""
+        if self.automaton is not None:
+            best = min((priority for _, priority in self.automaton.iter(text)), default=None)
+            return None if best is None else self.groups[best][0]
+        for value, keywords in self.groups:
+            if any(keyword in text for keyword in keywords):
+                return value
+        return None
+
+
+# 从类型字段值推断资产类型，未命中为OTHER
+_TYPE_VALUE_KEYWORDS = _KeywordMatcher([
+    (AssetType.SERVER, ('server', '服务器', '主机', 'host')),
+    (AssetType.NETWORK, ('switch', 'router', '交换机', '路由器', '网络', 'network')),
+    (AssetType.STORAGE, ('storage', '存储', 'nas', 'san', '存储设备')),
+    (AssetType.SECURITY, ('firewall', 'security', '防火墙', '安全', '安全设备')),
+    (AssetType.DATABASE, ('database', 'db', '数据库', 'mysql', 'oracle', 'postgresql')),
+    (AssetType.APPLICATION, ('application', 'app', '应用', '应用服务器')),
+])
+
+# 从状态字段值推断资产状态，未命中为ACTIVE
+_STATUS_VALUE_KEYWORDS = _KeywordMatcher([
+    (AssetStatus.ACTIVE, ('active', '活跃', '在线', '正常', '运行', '正在使用')),
+    (AssetStatus.INACTIVE, ('inactive', '不活跃', '离线', '停用', '闲置')),
+    (AssetStatus.MAINTENANCE, ('maintenance', '维护', '保养', '维修')),
+    (AssetStatus.RETIRED, ('retired', '报废', '退役', '淘汰')),
+])
+
+
 class EnhancedAssetExtractor:
     """增强版设备资产信息提取器"""
     
     def __init__(self):
         self.encoding_detector = EncodingDetector()
-        self.ip_pattern = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
-        self.mac_pattern = re.compile(r'\b[0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}\b')
-        self.hostname_pattern = re.compile(r'[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*')
+        self.ip_pattern = _compile_scan(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
+        self.mac_pattern = _compile_scan(r'\b[0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}[:-][0-9A-Fa-f]{2}\b')
+        self.hostname_pattern = _compile_scan(r'[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?(\.[a-zA-Z0-9]([a-zA-Z0-9\-]{0,61}[a-zA-Z0-9])?)*')
+        self.port_pattern = re.compile(r':(\d{1,5})\b')
         
         # 扩展的中文字段映射关系
         self.field_mappings = {
@@ -203,6 +304,9 @@ class EnhancedAssetExtractor:
                 '带外网络', 'ILO网络', 'DRAC网络', '管控网络'
             ]
         }
+        
+        # 有值列名组合 -> 字段对应结果，见 _resolve_field_keys
+        self._field_key_cache: Dict[Tuple[str, ...], Dict[str, str]] = {}
     
     def extract_from_file(self, file_path: str, file_content: bytes, file_type: str) -> List[Dict[str, Any]]:
         """从文件中提取资产信息"""
@@ -400,7 +504,8 @@ class EnhancedAssetExtractor:
             
             # 根据文件扩展名选择合适的引擎
             file_ext = file_path.lower().split('.')[-1] if '.' in file_path else 'xlsx'
-            engine = 'xlrd' if file_ext == 'xls' else 'openpyxl'
+            default_engine = 'xlrd' if file_ext == 'xls' else 'openpyxl'
+            engine = _EXCEL_ENGINE or default_engine
             logger.info(f"文件类型: {file_ext}, 使用引擎: {engine}")
             
             # 尝试读取所有工作表
@@ -409,9 +514,12 @@ class EnhancedAssetExtractor:
             except Exception as e:
                 logger.warning(f"使用引擎{engine}失败: {e}")
                 # 尝试其他引擎
-                alt_engine = 'openpyxl' if engine == 'xlrd' else 'xlrd'
+                if engine == _EXCEL_ENGINE:
+                    alt_engine = default_engine
+                else:
+                    alt_engine = 'openpyxl' if engine == 'xlrd' else 'xlrd'
                 try:
-                    excel_data = pd.ExcelFile(excel_file, engine=alt_engine)
+                    excel_data = pd.ExcelFile(BytesIO(content), engine=alt_engine)
                     engine = alt_engine
                     logger.info(f"切换到引擎{engine}成功")
                 except Exception as e2:
@@ -509,8 +617,9 @@ class EnhancedAssetExtractor:
         logger.info(f"开始解析CSV文件: {file_path}")
         
         try:
+            # utf-8-sig兼容无BOM的UTF-8，GBK是GB2312的超集，latin1兜底，失败的解码不再重复
             text_content = None
-            for encoding in ['utf-8-sig', 'utf-8', 'gbk', 'gb2312', 'latin1']:
+            for encoding in ('utf-8-sig', 'gbk', 'latin1'):
                 try:
                     text_content = content.decode(encoding)
                     logger.info(f"使用编码{encoding}解码成功")
@@ -523,32 +632,35 @@ class EnhancedAssetExtractor:
                 return []
             
             separators = [',', ';', '\t', '|']
-            best_data = None
+            best_separator = None
             max_columns = 0
+            csv_file = StringIO(text_content)
             
+            # 只解析首行数据来比较分隔符，选出列数最多的一个
             for sep in separators:
                 try:
-                    csv_file = StringIO(text_content)
-                    reader = csv.DictReader(csv_file, delimiter=sep)
-                    data = list(reader)
+                    csv_file.seek(0)
+                    first_row = next(csv.DictReader(csv_file, delimiter=sep), None)
                     
-                    if data and len(data[0]) > max_columns:
-                        max_columns = len(data[0])
-                        best_data = data
-                        logger.info(f"使用分隔符'{sep}'解析出{len(data)}行，{max_columns}列")
+                    if first_row and len(first_row) > max_columns:
+                        max_columns = len(first_row)
+                        best_separator = sep
                 except Exception as e:
                     logger.debug(f"分隔符'{sep}'解析失败: {e}")
                     continue
             
-            if not best_data:
+            if not best_separator:
                 logger.error("无法解析CSV文件")
                 return []
             
-            # 以IP为键聚合资产数据
+            logger.info(f"使用分隔符'{best_separator}'解析，{max_columns}列")
+            csv_file.seek(0)
+            
+            # 以IP为键聚合资产数据，逐行读取不整体载入
             ip_assets_map: Dict[str, Dict[str, Any]] = {}
             assets = []
             
-            for i, row in enumerate(best_data):
+            for i, row in enumerate(csv.DictReader(csv_file, delimiter=best_separator)):
                 asset_data = self._map_fields(row, f"CSV第{i+1}行")
                 if asset_data and any([
                     asset_data.get('name'),
@@ -716,9 +828,10 @@ class EnhancedAssetExtractor:
             logger.info(f"从表格文本提取到 {len(table_assets)} 个资产")
             return table_assets
         
-        # 查找IP地址和相关信息
+        # 查找IP地址和相关信息；各行只去除一次空白，逐行特征缓存后在相邻IP行的上下文间复用
+        lines = [line.strip() for line in lines]
+        feature_cache: Dict[int, Optional[Dict[str, Any]]] = {}
         for i, line in enumerate(lines):
-            line = line.strip()
             if not line:
                 continue
             
@@ -729,10 +842,10 @@ class EnhancedAssetExtractor:
                     asset_data = {'ip_address': ip}
                     
                     # 尝试从同一行提取其他信息
-                    self._extract_from_line(line, asset_data)
+                    self._apply_line_features(self._cached_line_features(lines, i, feature_cache), asset_data)
                     
                     # 尝试从前后几行提取相关信息
-                    self._extract_context_info(lines, i, asset_data)
+                    self._extract_context_info(lines, i, asset_data, feature_cache)
                     
                     # 设置默认值
                     asset_data.setdefault('name', asset_data.get('hostname') or f'Device-{ip}')
@@ -753,27 +866,134 @@ class EnhancedAssetExtractor:
         print(f"[DEBUG] 开始映射字段 [{context}]: {row_data}")
         logger.debug(f"开始映射字段 [{context}]: {row_data}")
         
+        # CSV（含Excel转换后）的单元格都是字符串，先按字符串处理；缺失值用自身不相等判断，不逐个调用pd.notna
         cleaned_data = {}
         for key, value in row_data.items():
-            if value is not None and value != '':
-                cleaned_key = str(key).strip().lower()
-                
-                if isinstance(value, (int, float, bool)):
-                    cleaned_data[cleaned_key] = value
-                elif isinstance(value, list):
-                    cleaned_data[cleaned_key] = value
-                elif isinstance(value, str):
-                    cleaned_value = value.strip()
-                    if cleaned_value and cleaned_value.lower() not in ['nan', 'null', 'none', '']:
-                        cleaned_data[cleaned_key] = cleaned_value
-                elif pd.notna(value):
-                    cleaned_value = str(value).strip()
-                    if cleaned_value and cleaned_value.lower() not in ['nan', 'null', 'none', '']:
-                        cleaned_data[cleaned_key] = cleaned_value
+            if isinstance(value, str):
+                cleaned_value = value.strip()
+                if cleaned_value and cleaned_value.lower() not in _EMPTY_CELL_VALUES:
+                    cleaned_data[str(key).strip().lower()] = cleaned_value
+            elif isinstance(value, (int, float, bool, list)):
+                cleaned_data[str(key).strip().lower()] = value
+            elif value is not None and value == value:
+                # NaT等缺失值不等于自身
+                cleaned_value = str(value).strip()
+                if cleaned_value and cleaned_value.lower() not in _EMPTY_CELL_VALUES:
+                    cleaned_data[str(key).strip().lower()] = cleaned_value
         
         logger.debug(f"清理后的数据 [{context}]: {cleaned_data}")
         
-        mapped_fields = {}
+        # 列名到标准字段的对应只取决于本行有值的列，按列组合缓存，避免每行重复模糊匹配
+        keys = tuple(cleaned_data)
+        resolved = self._field_key_cache.get(keys)
+        if resolved is None:
+            resolved = self._field_key_cache[keys] = self._resolve_field_keys(keys)
+        mapped_fields = {standard_field: cleaned_data[key] for standard_field, key in resolved.items()}
+        
+        logger.debug(f"映射结果 [{context}]: {mapped_fields}")
+        
+        # 处理映射的字段
+        for standard_field, value in mapped_fields.items():
+            if standard_field == 'ip':
+                print(f"[DEBUG] 发现IP字段: {value}")
+                extracted_ip = self._extract_ip_from_value(value)
+                if extracted_ip:
+                    asset_data['ip_address'] = extracted_ip
+                    print(f"[DEBUG] IP提取成功，设置ip_address: {extracted_ip}")
+                else:
+                    print(f"[DEBUG] IP提取失败: {value}")
+            elif standard_field == 'name':
+                asset_data['name'] = value
+            elif standard_field == 'hostname':
+                asset_data['hostname'] = value
+            elif standard_field == 'username':
+                asset_data['username'] = value
+            elif standard_field == 'password':
+                asset_data['password'] = value
+            elif standard_field == 'port':
+                try:
+                    port = int(float(value))
+                    if 1 <= port <= 65535:
+                        asset_data['port'] = port
+                except (ValueError, TypeError):
+                    pass
+            elif standard_field == 'type':
+                asset_data['asset_type'] = self._infer_asset_type(value)
+            elif standard_field == 'model':
+                asset_data['device_model'] = value
+            elif standard_field == 'manufacturer':
+                asset_data['manufacturer'] = value
+            elif standard_field == 'serial':
+                asset_data['serial_number'] = value
+            elif standard_field == 'location':
+                asset_data['location'] = value
+            elif standard_field == 'department':
+                asset_data['department'] = value
+            elif standard_field == 'status':
+                asset_data['status'] = self._infer_status(value)
+            elif standard_field == 'notes':
+                asset_data['notes'] = value
+            elif standard_field == 'mac':
+                if self._is_valid_mac(value):
+                    asset_data['mac_address'] = value
+            elif standard_field == 'os':
+                asset_data['os_version'] = value
+            elif standard_field == 'cpu':
+                asset_data['cpu'] = value
+            elif standard_field == 'memory':
+                asset_data['memory'] = value
+            elif standard_field == 'storage':
+                asset_data['storage'] = value
+            elif standard_field == 'service':
+                asset_data['service_name'] = value
+            elif standard_field == 'purpose':
+                asset_data['purpose'] = value
+            elif standard_field == 'network_location':
+                asset_data['network_location'] = self._infer_network_location(value)
+            elif standard_field == 'rack':
+                asset_data['rack'] = value
+            elif standard_field == 'login_type':
+                pass
+            elif standard_field == 'sequence':
+                pass
+            elif standard_field == 'asset_code':
+                asset_data['asset_code'] = value
+        
+        # 添加详细的调试信息
+        logger.info(f"映射后的asset_data [{context}]: {asset_data}")
+        
+        # 设置默认值和验证 - 只有确实有内容的资产才处理
+        if asset_data and (asset_data.get('ip_address') or asset_data.get('hostname') or asset_data.get('name')):
+            # 确保有名称
+            if not asset_data.get('name'):
+                asset_data['name'] = (asset_data.get('hostname') or 
+                                    f"Device-{asset_data.get('ip_address', 'Unknown')}")
+            
+            # 设置默认的资产类型
+            if not asset_data.get('asset_type'):
+                asset_data['asset_type'] = AssetType.SERVER.value
+            
+            # 设置默认状态
+            if not asset_data.get('status'):
+                asset_data['status'] = AssetStatus.ACTIVE.value
+            
+            # 设置默认网络位置
+            if not asset_data.get('network_location'):
+                asset_data['network_location'] = NetworkLocation.OFFICE.value
+            
+            # 设置置信度
+            asset_data['confidence_score'] = 85
+            
+            logger.info(f"✅ 成功映射资产 [{context}]: {asset_data['name']} (IP: {asset_data.get('ip_address', 'N/A')})")
+            return asset_data
+        
+        logger.debug(f"❌ 无法映射有效资产 [{context}]: asset_data={asset_data}, 缺少关键字段")
+        return None
+    
+    def _resolve_field_keys(self, keys: Tuple[str, ...]) -> Dict[str, str]:
+        """按列名确定每个标准字段取哪一列，返回 标准字段 -> 列名"""
+        key_set = set(keys)
+        resolved: Dict[str, str] = {}
         used_keys = set()
         
         # 第一轮：中文列名精确匹配（针对Excel中文表头）
@@ -816,10 +1036,10 @@ class EnhancedAssetExtractor:
         }
         
         for chinese_key, target_field in chinese_mappings.items():
-            if chinese_key in cleaned_data and chinese_key not in used_keys:
-                mapped_fields[target_field] = cleaned_data[chinese_key]
+            if chinese_key in key_set and chinese_key not in used_keys:
+                resolved[target_field] = chinese_key
                 used_keys.add(chinese_key)
-                logger.debug(f"中文精确匹配 [{context}]: {chinese_key} -> {target_field} = {cleaned_data[chinese_key]}")
+                logger.debug(f"中文精确匹配: {chinese_key} -> {target_field}")
         
         # 第二轮：标准英文字段名精确匹配
         standard_mappings = {
@@ -866,10 +1086,10 @@ class EnhancedAssetExtractor:
         }
         
         for std_key, target_field in standard_mappings.items():
-            if std_key in cleaned_data and std_key not in used_keys:
-                mapped_fields[target_field] = cleaned_data[std_key]
+            if std_key in key_set and std_key not in used_keys:
+                resolved[target_field] = std_key
                 used_keys.add(std_key)
-                logger.debug(f"标准字段匹配 [{context}]: {std_key} -> {target_field} = {cleaned_data[std_key]}")
+                logger.debug(f"标准字段匹配: {std_key} -> {target_field}")
         
         # 第三轮：模糊匹配（仅对未匹配的字段，使用严格阈值）
         def calculate_similarity(s1: str, s2: str) -> float:
@@ -887,7 +1107,7 @@ class EnhancedAssetExtractor:
             return False
         
         for standard_field, possible_names in self.field_mappings.items():
-            if standard_field in mapped_fields:
+            if standard_field in resolved:
                 continue
                 
             best_match = None
@@ -895,32 +1115,30 @@ class EnhancedAssetExtractor:
             
             for name in possible_names:
                 name_lower = name.lower()
-                for key in cleaned_data.keys():
+                for key in keys:
                     if key not in used_keys and len(name_lower) >= 3 and len(key) >= 3:
                         if contains_match(key, name_lower):
                             similarity = calculate_similarity(name_lower, key)
                             if similarity >= 0.7 and similarity > best_similarity:
                                 best_similarity = similarity
-                                best_match = (key, cleaned_data[key])
+                                best_match = key
             
             if best_match and best_similarity >= 0.7:
-                mapped_fields[standard_field] = best_match[1]
-                used_keys.add(best_match[0])
-                logger.debug(f"模糊匹配字段 [{context}]: {best_match[0]} -> {standard_field} = {best_match[1]} (相似度: {best_similarity:.2f})")
-        
-        logger.debug(f"映射结果 [{context}]: {mapped_fields}")
+                resolved[standard_field] = best_match
+                used_keys.add(best_match)
+                logger.debug(f"模糊匹配字段: {best_match} -> {standard_field} (相似度: {best_similarity:.2f})")
         
         # 处理映射的字段
         for standard_field, possible_names in self.field_mappings.items():
-            if standard_field in mapped_fields:
+            if standard_field in resolved:
                 continue  # 已经直接映射过了
                 
             for name in possible_names:
                 name_lower = name.lower()
-                if name_lower in cleaned_data and name_lower not in used_keys:
-                    mapped_fields[standard_field] = cleaned_data[name_lower]
+                if name_lower in key_set and name_lower not in used_keys:
+                    resolved[standard_field] = name_lower
                     used_keys.add(name_lower)
-                    logger.debug(f"精确匹配字段 [{context}]: {name_lower} -> {standard_field} = {cleaned_data[name_lower]}")
+                    logger.debug(f"精确匹配字段: {name_lower} -> {standard_field}")
                     break
         
         # 第二轮：模糊匹配（仅对未匹配的字段）
@@ -948,7 +1166,7 @@ class EnhancedAssetExtractor:
             return False
         
         for standard_field, possible_names in self.field_mappings.items():
-            if standard_field in mapped_fields:
+            if standard_field in resolved:
                 continue  # 已经有匹配结果，跳过
                 
             best_match = None
@@ -956,121 +1174,23 @@ class EnhancedAssetExtractor:
             
             for name in possible_names:
                 name_lower = name.lower()
-                for key in cleaned_data.keys():
+                for key in keys:
                     if key not in used_keys and len(name_lower) >= 2:
                         if contains_match(key, name_lower):
                             similarity = calculate_similarity(name_lower, key)
                             if similarity > best_similarity:
                                 best_similarity = similarity
-                                best_match = (key, cleaned_data[key])
+                                best_match = key
             if best_match:
-                mapped_fields[standard_field] = best_match[1]
-                used_keys.add(best_match[0])
-                logger.debug(f"模糊匹配字段 [{context}]: {best_match[0]} -> {standard_field} = {best_match[1]} (相似度: {best_similarity:.2f})")
+                resolved[standard_field] = best_match
+                used_keys.add(best_match)
+                logger.debug(f"模糊匹配字段: {best_match} -> {standard_field} (相似度: {best_similarity:.2f})")
         
-        logger.debug(f"映射结果 [{context}]: {mapped_fields}")
-        
-        # 处理映射的字段
-        for standard_field, value in mapped_fields.items():
-            if standard_field == 'ip':
-                print(f"[DEBUG] 发现IP字段: {value}")
-                extracted_ip = self._extract_ip_from_value(value)
-                if extracted_ip:
-                    asset_data['ip_address'] = extracted_ip
-                    print(f"[DEBUG] IP提取成功，设置ip_address: {extracted_ip}")
-                else:
-                    print(f"[DEBUG] IP提取失败: {value}")
-            elif standard_field == 'name':
-                asset_data['name'] = value
-            elif standard_field == 'hostname':
-                asset_data['hostname'] = value
-            elif standard_field == 'username':
-                asset_data['username'] = value
-            elif standard_field == 'password':
-                asset_data['password'] = value
-            elif standard_field == 'port':
-                try:
-                    port = int(float(value))
-                    if 1 <= port <= 65535:
-                        asset_data['port'] = port
-                except (ValueError, TypeError):
-                    pass
-            elif standard_field == 'type':
-                asset_data['asset_type'] = self._infer_asset_type(value)
-            elif standard_field == 'model':
-                asset_data['device_model'] = value
-            elif standard_field == 'manufacturer':
-                asset_data['manufacturer'] = value
-            elif standard_field == 'serial':
-                asset_data['serial_number'] = value
-            elif standard_field == 'location':
-                asset_data['location'] = value
-            elif standard_field == 'department':
-                asset_data['department'] = value
-            elif standard_field == 'status':
-                asset_data['status'] = self._infer_status(value)
-            elif standard_field == 'notes':
-                asset_data['notes'] = value
-            elif standard_field == 'mac':
-                if self._is_valid_mac(value):
-                    asset_data['mac_address'] = value
-            elif standard_field == 'os':
-                asset_data['os_version'] = value
-            elif standard_field == 'cpu':
-                asset_data['cpu'] = value
-            elif standard_field == 'memory':
-                asset_data['memory'] = value
-            elif standard_field == 'storage':
-                asset_data['storage'] = value
-            elif standard_field == 'service':
-                asset_data['service_name'] = value
-            elif standard_field == 'purpose':
-                asset_data['purpose'] = value
-            elif standard_field == 'network_location':
-                asset_data['network_location'] = self._infer_network_location(value)
-            elif standard_field == 'rack':
-                asset_data['rack'] = value
-            elif standard_field == 'login_type':
-                pass
-            elif standard_field == 'sequence':
-                pass
-            elif standard_field == 'asset_code':
-                asset_data['asset_code'] = value
-        
-        # 添加详细的调试信息
-        logger.info(f"映射后的asset_data [{context}]: {asset_data}")
-        
-        # 设置默认值和验证 - 只有确实有内容的资产才处理
-        if asset_data and (asset_data.get('ip_address') or asset_data.get('hostname') or asset_data.get('name')):
-            # 确保有名称
-            if not asset_data.get('name'):
-                asset_data['name'] = (asset_data.get('hostname') or 
-                                    f"Device-{asset_data.get('ip_address', 'Unknown')}")
-            
-            # 设置默认的资产类型
-            if not asset_data.get('asset_type'):
-                asset_data['asset_type'] = AssetType.SERVER.value
-            
-            # 设置默认状态
-            if not asset_data.get('status'):
-                asset_data['status'] = AssetStatus.ACTIVE.value
-            
-            # 设置默认网络位置
-            if not asset_data.get('network_location'):
-                asset_data['network_location'] = NetworkLocation.OFFICE.value
-            
-            # 设置置信度
-            asset_data['confidence_score'] = 85
-            
-            logger.info(f"✅ 成功映射资产 [{context}]: {asset_data['name']} (IP: {asset_data.get('ip_address', 'N/A')})")
-            return asset_data
-        
-        logger.debug(f"❌ 无法映射有效资产 [{context}]: asset_data={asset_data}, 缺少关键字段")
-        return None
+        return resolved
     
     def _extract_ip_from_value(self, value: str) -> Optional[str]:
         """从各种格式的值中提取IP地址"""
-        if not value or pd.isna(value):
+        if not value or value != value:
             return None
         
         value_str = str(value).strip()
@@ -1103,11 +1223,22 @@ class EnhancedAssetExtractor:
         return None
     
     def _is_valid_ip(self, ip_str: str) -> bool:
-        """验证IP地址格式"""
+        """验证IP地址格式（inet_pton在C层解析，不创建地址对象）"""
+        if not isinstance(ip_str, str):
+            return False
+        try:
+            socket.inet_pton(socket.AF_INET, ip_str)
+            return True
+        except (OSError, ValueError):
+            pass
+        # IPv6可带%scope后缀（如fe80::1%eth0），inet_pton不接受，去掉后再校验
+        address, sep, scope = ip_str.partition('%')
+        if sep and (not scope or '%' in scope):
+            return False
         try:
-            ipaddress.ip_address(ip_str)
+            socket.inet_pton(socket.AF_INET6, address)
             return True
-        except ValueError:
+        except (OSError, ValueError):
             return False
     
     def _is_valid_mac(self, mac_str: str) -> bool:
@@ -1116,39 +1247,13 @@ class EnhancedAssetExtractor:
     
     def _infer_asset_type(self, type_str: str) -> AssetType:
         """推断资产类型（增强版）"""
-        type_lower = type_str.lower()
-        
-        if any(word in type_lower for word in ['server', '服务器', '主机', 'host']):
-            return AssetType.SERVER.value
-        elif any(word in type_lower for word in ['switch', 'router', '交换机', '路由器', '网络', 'network']):
-            return AssetType.NETWORK.value
-        elif any(word in type_lower for word in ['storage', '存储', 'nas', 'san', '存储设备']):
-            return AssetType.STORAGE.value
-        elif any(word in type_lower for word in ['firewall', 'security', '防火墙', '安全', '安全设备']):
-            return AssetType.SECURITY.value
-        elif any(word in type_lower for word in ['database', 'db', '数据库', 'mysql', 'oracle', 'postgresql']):
-            return AssetType.DATABASE.value
-        elif any(word in type_lower for word in ['application', 'app', '应用', '应用服务器']):
-            return AssetType.APPLICATION.value
-        elif any(word in type_lower for word in ['monitor', '监控', '监控设备', '监控系统']):
-            return AssetType.OTHER.value
-        else:
-            return AssetType.OTHER.value
+        asset_type = _TYPE_VALUE_KEYWORDS.first(type_str.lower())
+        return (AssetType.OTHER if asset_type is None else asset_type).value
     
     def _infer_status(self, status_str: str) -> AssetStatus:
         """推断资产状态"""
-        status_lower = status_str.lower()
-        
-        if any(word in status_lower for word in ['active', '活跃', '在线', '正常', '运行', '正在使用']):
-            return AssetStatus.ACTIVE.value
-        elif any(word in status_lower for word in ['inactive', '不活跃', '离线', '停用', '闲置']):
-            return AssetStatus.INACTIVE.value
-        elif any(word in status_lower for word in ['maintenance', '维护', '保养', '维修']):
-            return AssetStatus.MAINTENANCE.value
-        elif any(word in status_lower for word in ['retired', '报废', '退役', '淘汰']):
-            return AssetStatus.RETIRED.value
-        else:
-            return AssetStatus.ACTIVE.value  # 默认为活跃
+        status = _STATUS_VALUE_KEYWORDS.first(status_str.lower())
+        return (AssetStatus.ACTIVE if status is None else status).value
     
     def _infer_network_location(self, location_str: str) -> NetworkLocation:
         """推断网络位置"""
@@ -1256,8 +1361,12 @@ class EnhancedAssetExtractor:
         logger.info(f"表格文本提取完成，共提取 {len(assets)} 个资产")
         return assets
     
-    def _extract_context_info(self, lines: List[str], current_index: int, asset_data: Dict[str, Any]):
-        """从上下文行中提取相关信息"""
+    def _extract_context_info(self, lines: List[str], current_index: int, asset_data: Dict[str, Any],
+                              feature_cache: Optional[Dict[int, Optional[Dict[str, Any]]]] = None):
+        """从上下文行中提取相关信息，lines 为已去除首尾空白的行"""
+        if feature_cache is None:
+            feature_cache = {}
+        
         # 检查前后3行
         for offset in range(-3, 4):
             if offset == 0:
@@ -1265,37 +1374,186 @@ class EnhancedAssetExtractor:
             
             check_index = current_index + offset
             if 0 <= check_index < len(lines):
-                context_line = lines[check_index].strip()
-                if context_line:
-                    self._extract_from_line(context_line, asset_data, is_context=True)
+                features = self._cached_line_features(lines, check_index, feature_cache)
+                if features is not None:
+                    self._apply_line_features(features, asset_data, is_context=True)
+    
+    def _cached_line_features(self, lines: List[str], index: int,
+                              feature_cache: Dict[int, Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """按行号缓存单行特征，相邻IP行共享上下文时不重复解析"""
+        if index not in feature_cache:
+            feature_cache[index] = self._line_features(lines[index]) if lines[index] else None
+        return feature_cache[index]
     
     def _extract_from_line(self, line: str, asset_data: Dict[str, Any], is_context: bool = False):
         """从单行文本中提取设备信息"""
-        line_lower = line.lower()
-        
-        # 提取主机名
-        if not is_context or not asset_data.get('hostname'):
-            hostname_matches = self.hostname_pattern.findall(line)
-            if hostname_matches:
-                hostnames = [h[0] if isinstance(h, tuple) else h for h in hostname_matches]
-                hostnames = [h for h in hostnames if not self.ip_pattern.match(h) and len(h) > 2]
-                if hostnames:
-                    best_hostname = max(hostnames, key=lambda x: len(x) + (10 if '.' in x else 0))
-                    asset_data['hostname'] = best_hostname
-        
-        # 提取MAC地址
-        mac_matches = self.mac_pattern.findall(line)
-        if mac_matches and not asset_data.get('mac_address'):
-            asset_data['mac_address'] = mac_matches[0]
-        
-        # 提取端口号
-        port_match = re.search(r':(\d{1,5})\b', line)
-        if port_match and not asset_data.get('port'):
-            port = int(port_match.group(1))
-            if 1 <= port <= 65535:
-                asset_data['port'] = port
-        
-        # ... 其他提取逻辑保持不变 ...
+        self._apply_line_features(self._line_features(line), asset_data, is_context)
+    
+    def _line_features(self, line: str) -> Dict[str, Any]:
+        """提取单行文本中的主机名、MAC地址和端口，结果与已有资产数据无关，可在多个资产间复用"""
+        features: Dict[str, Any] = {}
+        
+        # 主机名：过滤掉IP地址，选择最长的主机名
+        hostnames = [h[0] if isinstance(h, tuple) else h for h in self.hostname_pattern.findall(line)]
+        hostnames = [h for h in hostnames if not self.ip_pattern.match(h) and len(h) > 2]
+        features['hostname'] = max(hostnames, key=lambda x: len(x) + (10 if '.' in x else 0)) if hostnames else None
+        
+        # MAC地址
+        mac_match = self.mac_pattern.search(line)
+        features['mac_address'] = mac_match.group(0) if mac_match else None
+        
+        # 端口号
+        port_match = self.port_pattern.search(line)
+        port = int(port_match.group(1)) if port_match else 0
+        features['port'] = port if 1 <= port <= 65535 else None
+        
+        return features
+    
+    def _apply_line_features(self, features: Dict[str, Any], asset_data: Dict[str, Any], is_context: bool = False):
+        """将单行特征合并到资产数据，已有的值不被上下文覆盖"""
+        # 主机名（仅在非上下文模式或主机名不存在时）
+        if features['hostname'] and (not is_context or not asset_data.get('hostname')):
+            asset_data['hostname'] = features['hostname']
+        
+        for field in ('mac_address', 'port'):
+            if features[field] and not asset_data.get(field):
+                asset_data[field] = features[field]
+    
+    def merge_similar_assets(self, assets: List[Dict[str, Any]], threshold: int = 80) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """合并相似的资产"""
+        if not assets:
+            return assets, []
+        
+        merged_assets = []
+        merged_groups = []
+        processed = set()
+        
+        for start, block in self._similarity_blocks(assets):
+            for i in range(start, start + len(block)):
+                if i in processed:
+                    continue
+                asset = assets[i]
+                row = block[i - start]
+                
+                # 查找相似的资产（row 的第k列对应资产 start+k）
+                similar_indices = [i] + [
+                    j for j in (start + np.flatnonzero(row >= threshold)).tolist()
+                    if i != j and j not in processed
+                ]
+                similar_assets = [assets[j] for j in similar_indices]
+                
+                # 标记为已处理
+                processed.update(similar_indices)
+                
+                if len(similar_assets) > 1:
+                    # 合并资产
+                    merged_asset = self._merge_assets(similar_assets)
+                    merged_asset['is_merged'] = True
+                    merged_asset['merged_from'] = similar_indices
+                    merged_assets.append(merged_asset)
+                    merged_groups.append({
+                        'merged_asset': merged_asset,
+                        'source_assets': similar_assets,
+                        'similarity_scores': [int(row[j - start]) for j in similar_indices[1:]]
+                    })
+                else:
+                    merged_assets.append(asset)
+        
+        logger.info(f"相似资产合并完成: {len(assets)} -> {len(merged_assets)}，合并 {len(merged_groups)} 组")
+        return merged_assets, merged_groups
+    
+    def _similarity_blocks(self, assets: List[Dict[str, Any]]) -> Iterator[Tuple[int, np.ndarray]]:
+        """按行分块计算资产相似度，逐块产出 (起始行, 相似度块)
+        
+        块的第k列对应资产 start+k。合并时排在前面的资产都已处理，只需与 start 之后的资产比较，
+        每块约 _SIMILARITY_BLOCK_CELLS 个单元，内存占用与资产总数无关。
+        """
+        count = len(assets)
+        rows = max(1, _SIMILARITY_BLOCK_CELLS // count)
+        
+        if process is None:
+            for start in range(0, count, rows):
+                stop = min(start + rows, count)
+                block = np.zeros((stop - start, count - start), dtype=int)
+                for i in range(start, stop):
+                    for j in range(i + 1, count):
+                        block[i - start, j - start] = self._calculate_similarity(assets[i], assets[j])
+                yield start, block
+            return
+        
+        fields = []
+        for field, weight in _SIMILARITY_WEIGHTS.items():
+            values = [_similarity_value(asset, field) for asset in assets]
+            present = np.array([bool(value) for value in values])
+            if present.any():
+                fields.append((weight, values, present))
+        
+        for start in range(0, count, rows):
+            stop = min(start + rows, count)
+            score = np.zeros((stop - start, count - start))
+            total_weight = np.zeros((stop - start, count - start))
+            for weight, values, present in fields:
+                # 两个都有值时按字符串相似度计分，只有一个有值时降低相似度
+                row_present = present[start:stop, None]
+                col_present = present[None, start:]
+                similarity = process.cdist(values[start:stop], values[start:], scorer=fuzz.ratio,
+                                           dtype=np.float64, workers=-1) / 100
+                score += weight * similarity * (row_present & col_present)
+                total_weight += weight * (row_present | col_present)
+            
+            with np.errstate(divide='ignore', invalid='ignore'):
+                block = np.where(total_weight > 0, score / total_weight * 100, 0)
+            yield start, block.astype(int)
+    
+    def _calculate_similarity(self, asset1: Dict[str, Any], asset2: Dict[str, Any]) -> int:
+        """计算两个资产的相似度"""
+        score = 0
+        total_weight = 0
+        
+        for field, weight in _SIMILARITY_WEIGHTS.items():
+            val1 = _similarity_value(asset1, field)
+            val2 = _similarity_value(asset2, field)
+            
+            if val1 and val2:
+                if val1 == val2:
+                    score += weight
+                else:
+                    # 使用字符串相似度
+                    similarity = SequenceMatcher(None, val1, val2).ratio()
+                    score += weight * similarity
+                total_weight += weight
+            elif val1 or val2:
+                # 一个有值一个没有，降低相似度
+                total_weight += weight
+        
+        return int((score / total_weight * 100) if total_weight > 0 else 0)
+    
+    def _merge_assets(self, assets: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """合并多个资产为一个"""
+        if not assets:
+            return {}
+        
+        merged = assets[0].copy()
+        
+        # 合并策略：优先选择最完整的信息
+        for asset in assets[1:]:
+            for key, value in asset.items():
+                if value and (not merged.get(key) or len(str(value)) > len(str(merged.get(key, '')))):
+                    merged[key] = value
+        
+        # 合并标签
+        all_tags = set()
+        for asset in assets:
+            tags = asset.get('tags', [])
+            if isinstance(tags, list):
+                all_tags.update(tags)
+            elif isinstance(tags, str):
+                all_tags.update([tag.strip() for tag in tags.split(',') if tag.strip()])
+        
+        merged['tags'] = list(all_tags)
+        merged['confidence_score'] = min(95, max(asset.get('confidence_score', 100) for asset in assets))
+        
+        return merged
     
     def convert_to_asset_create(self, asset_data: Dict[str, Any]) -> AssetCreate:
         """将提取的数据转换为AssetCreate对象（增强版）"""
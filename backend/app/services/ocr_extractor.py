@@ -5,7 +5,8 @@ OCR文本提取器 - 处理扫描版PDF和图像
 import os
 import io
 import logging
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from pathlib import Path
 
 try:
@@ -25,6 +26,9 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# 并行OCR的最大线程数（每个线程对应一个tesseract子进程）
+OCR_MAX_WORKERS = min(4, os.cpu_count() or 1)
+
 
 # Tesseract路径配置
 try:
@@ -65,19 +69,16 @@ class OCRExtractor:
             
             # 检查前3页
             scanned_pages = 0
-            total_checked = min(3, len(doc))
+            total_checked = min(3, doc.page_count)
             
             for page_num in range(total_checked):
                 page = doc.load_page(page_num)
                 
-                # 检查文本内容
-                text = page.get_text().strip()
-                
-                # 检查图像数量
-                images = page.get_images()
+                # 检查文本内容：只需字符数，使用最少的提取选项（不做连字展开和页面框裁剪）
+                text = page.get_text("text", flags=fitz.TEXT_PRESERVE_WHITESPACE).strip()
                 
-                # 如果页面几乎没有文本但有大图像，可能是扫描版
-                if len(text) < 50 and len(images) > 0:
+                # 如果页面几乎没有文本但有图像，可能是扫描版；文本足够时不再查询图像
+                if len(text) < 50 and page.get_images():
                     scanned_pages += 1
             
             doc.close()
@@ -106,9 +107,11 @@ class OCRExtractor:
             doc = fitz.open(file_path)
             extracted_texts = []
             
-            page_count = min(len(doc), max_pages)
+            page_count = min(doc.page_count, max_pages)
             logger.info(f"开始OCR处理，页数: {page_count}")
             
+            # PyMuPDF 不支持多线程访问，页面渲染在当前线程顺序完成
+            page_images = []
             for page_num in range(page_count):
                 try:
                     page = doc.load_page(page_num)
@@ -120,23 +123,22 @@ class OCRExtractor:
                     
                     # 使用PIL处理图像
                     if Image:
-                        img = Image.open(io.BytesIO(img_data))
+                        page_images.append((page_num, Image.open(io.BytesIO(img_data))))
                         
-                        # OCR提取文本
-                        text = pytesseract.image_to_string(img, lang='chi_sim+eng')
-                        
-                        if text.strip():
-                            extracted_texts.append(f"[页面 {page_num + 1}]\n{text.strip()}\n")
-                            logger.info(f"页面 {page_num + 1} OCR成功，提取 {len(text)} 字符")
-                        else:
-                            logger.warning(f"页面 {page_num + 1} OCR未提取到文本")
-                            
                 except Exception as e:
-                    logger.error(f"页面 {page_num + 1} OCR失败: {e}")
+                    logger.error(f"页面 {page_num + 1} 渲染失败: {e}")
                     continue
             
             doc.close()
             
+            # 每页OCR启动独立的tesseract进程，用线程池并行等待，结果按页序返回
+            for page_num, text in self._ocr_pages(page_images):
+                if text:
+                    extracted_texts.append(f"[页面 {page_num + 1}]\n{text}\n")
+                    logger.info(f"页面 {page_num + 1} OCR成功，提取 {len(text)} 字符")
+                else:
+                    logger.warning(f"页面 {page_num + 1} OCR未提取到文本")
+            
             if extracted_texts:
                 full_text = "\n".join(extracted_texts)
                 return full_text, None
@@ -146,6 +148,21 @@ class OCRExtractor:
         except Exception as e:
             return None, f"OCR处理失败: {str(e)}"
     
+    def _ocr_pages(self, page_images: List[Tuple[int, 'Image.Image']]) -> List[Tuple[int, str]]:
+        """并行识别多页图像，单页失败时该页返回空文本"""
+        def ocr_page(item):
+            page_num, img = item
+            try:
+                return page_num, pytesseract.image_to_string(img, lang='chi_sim+eng').strip()
+            except Exception as e:
+                logger.error(f"页面 {page_num + 1} OCR失败: {e}")
+                return page_num, ""
+        
+        if not page_images:
+            return []
+        with ThreadPoolExecutor(max_workers=min(len(page_images), OCR_MAX_WORKERS)) as pool:
+            return list(pool.map(ocr_page, page_images))
+    
     def extract_text_from_image(self, file_path: str) -> Tuple[Optional[str], Optional[str]]:
         """从图片文件提取文本"""
         if not self.tesseract_available:
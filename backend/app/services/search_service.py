@@ -8,17 +8,29 @@ import re
 import json
 import subprocess
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 
 # 导入智能编码检测工具
 from app.utils.encoding_detector import EncodingDetector
+from app.core.cache import SimpleMemoryCache
 
 try:
     import markdown
 except ImportError:
     markdown = None
 
+# 需要LibreOffice/OCR转换的格式，提取结果按文件身份（路径、修改时间、大小）缓存，
+# 文件被替换或修改后键随之变化，不会读到旧内容
+CONVERTED_EXTENSIONS = {'.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+                        '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif', '.webp'}
+CONTENT_CACHE_TTL = 600  # 秒
+CONTENT_CACHE_MAX_SIZE = 64  # 达到上限时整体清空
+
+_content_cache = SimpleMemoryCache(default_ttl=CONTENT_CACHE_TTL)
+
+
 class SearchService:
     """文件内容搜索服务 - 简化版"""
     
@@ -101,7 +113,26 @@ class SearchService:
         return results
     
     def extract_file_content(self, file_path: str) -> Optional[str]:
-        """提取文件内容 - 简化版"""
+        """提取文件内容 - 简化版，转换类格式的结果按文件身份缓存"""
+        if Path(file_path).suffix.lower() not in CONVERTED_EXTENSIONS:
+            return self._extract_file_content(file_path)
+        
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        key = f"{file_path}:{stat.st_mtime_ns}:{stat.st_size}"
+        content = _content_cache.get(key)
+        if content is None:
+            content = self._extract_file_content(file_path)
+            if content:
+                if len(_content_cache.cache) >= CONTENT_CACHE_MAX_SIZE:
+                    _content_cache.clear()
+                _content_cache.set(key, content)
+        return content
+    
+    def _extract_file_content(self, file_path: str) -> Optional[str]:
+        """按文件类型提取内容"""
         try:
             if not os.path.exists(file_path):
                 return None
@@ -830,12 +861,17 @@ class SearchService:
             # 将PDF转换为图片（只处理前3页）
             pages = pdf2image.convert_from_path(file_path, dpi=200, first_page=1, last_page=3)
             
+            def ocr_page(page):
+                return pytesseract.image_to_string(page, lang='chi_sim+eng', config='--psm 6')
+            
+            # 各页OCR分别启动tesseract子进程，用线程池并行识别，map按页序返回结果
+            texts = []
+            if pages:
+                with ThreadPoolExecutor(max_workers=min(len(pages), os.cpu_count() or 1)) as pool:
+                    texts = list(pool.map(ocr_page, pages))
+            
             extracted_text = []
-            for i, page in enumerate(pages):
-                print(f"[DEBUG] OCR识别第{i+1}页")
-                
-                # 使用OCR识别文本
-                text = pytesseract.image_to_string(page, lang='chi_sim+eng', config='--psm 6')
+            for i, text in enumerate(texts):
                 if text.strip():
                     extracted_text.append(f"--- 第{i+1}页 ---\n{text.strip()}")
             
@@ -11,6 +11,14 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# 基础清理用到的正则，模块加载时编译一次
+_CONTROL_CHARS_RE = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+_HSPACE_RUN_RE = re.compile(r'[ \t]+')
+_NEWLINE_RUN_RE = re.compile(r'\n{3,}')
+
+# 表格行分隔符：竖线、制表符、连续两个空格、制表线
+_TABLE_SEPARATOR_RE = re.compile(r'\||\t|  |│|┃')
+
 class SmartTextProcessor:
     """
     智能文本处理器
@@ -116,19 +124,14 @@ class SmartTextProcessor:
         text = text.replace('\r\n', '\n').replace('\r', '\n')
         
         # 移除不可见字符
-        text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
+        text = _CONTROL_CHARS_RE.sub('', text)
         
         # 规范化空白字符
-        text = re.sub(r'[ \t]+', ' ', text)  # 多个空格/制表符合并
-        text = re.sub(r'\n{3,}', '\n\n', text)  # 多个换行符合并
-        
-        # 移除行首行尾空白
-        lines = []
-        for line in text.split('\n'):
-            cleaned_line = line.strip()
-            lines.append(cleaned_line)
+        text = _HSPACE_RUN_RE.sub(' ', text)  # 多个空格/制表符合并
+        text = _NEWLINE_RUN_RE.sub('\n\n', text)  # 多个换行符合并
         
-        return '\n'.join(lines)
+        # 移除行首行尾空白（保留空行）
+        return '\n'.join([line.strip() for line in text.split('\n')])
     
     def _correct_ocr_errors(self, text: str, doc_type: str) -> Tuple[str, int]:
         """
@@ -442,11 +445,11 @@ class SmartTextProcessor:
         """
         判断是否为表格行
         """
-        # 简单的表格行检测
-        separators = ['|', '\t', '  ', '│', '┃']
-        separator_count = sum(line.count(sep) for sep in separators)
-        
-        return separator_count >= 2 and len(line) > 10
+        # 简单的表格行检测：一次扫描，找到两个分隔符即可判定
+        if len(line) <= 10:
+            return False
+        separators = _TABLE_SEPARATOR_RE.finditer(line)
+        return next(separators, None) is not None and next(separators, None) is not None
     
     # 新增的增强功能方法
     def _is_code_block_marker(self, line: str) -> bool:
@@ -4,13 +4,26 @@
 处理大型文档时避免内存溢出
 """
 import os
+import re
 import logging
 import mmap
 from typing import Optional, Iterator, Tuple, Generator
 from pathlib import Path
 
+try:
+    import fitz  # PyMuPDF
+except ImportError:
+    fitz = None
+
 logger = logging.getLogger(__name__)
 
+# 每处理多少页收缩一次 MuPDF 的全局对象缓存，避免大文档逐页处理时常驻内存持续增长
+PDF_STORE_SHRINK_INTERVAL = 10
+
+# 单页文本清理用到的正则，模块加载时编译一次
+_SPACE_RUN_RE = re.compile(r'\s{4,}')
+_NEWLINE_RUN_RE = re.compile(r'\n{4,}')
+
 class StreamingFileProcessor:
     """
     流式文件处理器
@@ -97,13 +110,14 @@ class StreamingFileProcessor:
                 current_length = 0
                 
                 for chunk in self.read_text_file_streaming(file_path):
+                    # 如果指定了最大长度且超过限制，只截取最后一块的所需部分，拼接只做一次
+                    if max_length and current_length + len(chunk) > max_length:
+                        content_parts.append(chunk[:max_length - current_length])
+                        content_parts.append("\n\n[内容已截断...]")
+                        return ''.join(content_parts)
+                    
                     content_parts.append(chunk)
                     current_length += len(chunk)
-                    
-                    # 如果指定了最大长度且超过限制，截断
-                    if max_length and current_length > max_length:
-                        content = ''.join(content_parts)[:max_length]
-                        return content + "\n\n[内容已截断...]"
                 
                 return ''.join(content_parts)
                 
@@ -116,14 +130,14 @@ class StreamingFileProcessor:
         分批处理PDF页面
         避免一次性加载所有页面到内存
         """
-        total_pages = len(pdf_doc)
+        total_pages = pdf_doc.page_count
         process_pages = min(total_pages, max_pages)
         
         logger.info(f"开始分批处理PDF页面: 总页数={total_pages}, 处理页数={process_pages}")
         
         for page_num in range(process_pages):
             try:
-                page = pdf_doc[page_num]
+                page = pdf_doc.load_page(page_num)
                 text = page.get_text("text", sort=True)
                 
                 # 基础清理
@@ -132,9 +146,10 @@ class StreamingFileProcessor:
                 
                 yield page_num, text
                 
-                # 释放页面引用（如果支持）
-                if hasattr(page, 'close'):
-                    page.close()
+                # 释放页面引用，并定期清理 MuPDF 缓存的已解析页面数据
+                page = None
+                if fitz and (page_num + 1) % PDF_STORE_SHRINK_INTERVAL == 0:
+                    fitz.TOOLS.store_shrink(100)
                     
             except Exception as e:
                 logger.warning(f"处理页面 {page_num + 1} 失败: {e}")
@@ -150,18 +165,11 @@ class StreamingFileProcessor:
         
         try:
             # 移除过多空白
-            import re
-            text = re.sub(r'\s{4,}', '  ', text)  # 4个以上空格替换为2个
-            text = re.sub(r'\n{4,}', '\n\n', text)  # 4个以上换行替换为2个
-            
-            # 移除行首行尾空白
-            lines = []
-            for line in text.split('\n'):
-                stripped = line.strip()
-                if stripped:
-                    lines.append(stripped)
+            text = _SPACE_RUN_RE.sub('  ', text)  # 4个以上空格替换为2个
+            text = _NEWLINE_RUN_RE.sub('\n\n', text)  # 4个以上换行替换为2个
             
-            return '\n'.join(lines)
+            # 移除行首行尾空白和空行，每行只 strip 一次
+            return '\n'.join([stripped for line in text.split('\n') if (stripped := line.strip())])
             
         except Exception:
             return text.strip()
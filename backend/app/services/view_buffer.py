@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+文档查看/下载计数缓冲 - 合并高频写入后定期批量落库
+"""
+import threading
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional
+from sqlalchemy import update, insert, bindparam, func, select
+from sqlalchemy.exc import IntegrityError
+from app.db.database import SessionLocal
+from app.models.document import Document, DocumentView, DocumentDownload
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_documents = Document.__table__
+
+# 连续写入失败达到该次数后丢弃积压数据，避免缓冲区无限增长
+MAX_FLUSH_RETRIES = 3
+
+# 按文档ID批量累加计数：每个参数组一条 UPDATE，由驱动以executemany方式执行
+_add_views_stmt = update(_documents).where(
+    _documents.c.id == bindparam("doc_id")
+).values(view_count=func.coalesce(_documents.c.view_count, 0) + bindparam("delta"))
+
+_add_downloads_stmt = update(_documents).where(
+    _documents.c.id == bindparam("doc_id")
+).values(download_count=func.coalesce(_documents.c.download_count, 0) + bindparam("delta"))
+
+
+class ViewCountBuffer:
+    """文档查看/下载计数缓冲器"""
+
+    def __init__(self, flush_interval: float = 2.0, flush_threshold: int = 100):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold  # 积压日志达到该条数时提前刷新
+        self.is_running = False
+        self.lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+        self._flush_thread: Optional[threading.Thread] = None
+        self._failed_flushes = 0
+        self._reset_buffers()
+
+    def _reset_buffers(self):
+        self.view_deltas: Dict[int, int] = defaultdict(int)
+        self.download_deltas: Dict[int, int] = defaultdict(int)
+        self.view_logs: List[Dict[str, Any]] = []
+        self.download_logs: List[Dict[str, Any]] = []
+
+    def start(self):
+        """启动定期刷新线程"""
+        if not self.is_running:
+            self.is_running = True
+            self._stop_event.clear()
+            self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flush_thread.start()
+            logger.info("文档计数缓冲已启动")
+
+    def stop(self):
+        """停止刷新线程并写入剩余数据"""
+        if self.is_running:
+            self.is_running = False
+            self._stop_event.set()
+            self._wake_event.set()
+            if self._flush_thread:
+                self._flush_thread.join(timeout=5)
+        self.flush()
+        logger.info("文档计数缓冲已停止")
+
+    def record_view(self, document_id: int, user_id: Optional[int] = None, ip_address: Optional[str] = None):
+        """记录一次文档查看"""
+        log = self._make_log(document_id, user_id, ip_address)
+        with self.lock:
+            self.view_deltas[document_id] += 1
+            self.view_logs.append(log)
+            pending = len(self.view_logs) + len(self.download_logs)
+        self._wake_if_full(pending)
+
+    def record_download(self, document_id: int, user_id: Optional[int] = None, ip_address: Optional[str] = None):
+        """记录一次文档下载"""
+        log = self._make_log(document_id, user_id, ip_address)
+        with self.lock:
+            self.download_deltas[document_id] += 1
+            self.download_logs.append(log)
+            pending = len(self.view_logs) + len(self.download_logs)
+        self._wake_if_full(pending)
+
+    def _wake_if_full(self, pending: int):
+        """积压达到阈值时唤醒刷新线程，不在请求线程里写库"""
+        if pending >= self.flush_threshold:
+            self._wake_event.set()
+
+    @staticmethod
+    def _make_log(document_id: int, user_id: Optional[int], ip_address: Optional[str]) -> Dict[str, Any]:
+        # 记录发生时间，而不是落库时间
+        return {
+            "document_id": document_id,
+            "user_id": user_id,
+            "ip_address": ip_address,
+            "created_at": datetime.now(timezone.utc)
+        }
+
+    def flush(self) -> int:
+        """将缓冲的计数和日志在一个事务内写入数据库，返回写入的日志条数"""
+        with self.lock:
+            view_deltas, download_deltas = self.view_deltas, self.download_deltas
+            view_logs, download_logs = self.view_logs, self.download_logs
+            self._reset_buffers()
+
+        if not (view_deltas or download_deltas or view_logs or download_logs):
+            return 0
+
+        db = SessionLocal()
+        try:
+            self._write(db, view_deltas, download_deltas, view_logs, download_logs)
+            db.commit()
+            self._failed_flushes = 0
+            return len(view_logs) + len(download_logs)
+        except IntegrityError as e:
+            # 重试不会成功（如文档在刷新前已被删除），过滤掉失效引用后写入一次，仍失败则丢弃
+            db.rollback()
+            logger.warning(f"文档计数写入违反约束，过滤失效记录后重写: {e}")
+            return self._write_filtered(db, view_deltas, download_deltas, view_logs, download_logs)
+        except Exception as e:
+            db.rollback()
+            self._failed_flushes += 1
+            if self._failed_flushes >= MAX_FLUSH_RETRIES:
+                self._failed_flushes = 0
+                logger.error(
+                    f"文档计数连续{MAX_FLUSH_RETRIES}次写入失败，丢弃本批数据"
+                    f"（{len(view_logs) + len(download_logs)}条日志）: {e}"
+                )
+                return 0
+            logger.error(f"文档计数批量写入失败，数据将在下次刷新时重试: {e}")
+            self._requeue(view_deltas, download_deltas, view_logs, download_logs)
+            return 0
+        finally:
+            db.close()
+
+    @staticmethod
+    def _write(db, view_deltas, download_deltas, view_logs, download_logs):
+        """在当前事务内执行计数累加和日志插入"""
+        if view_deltas:
+            db.execute(_add_views_stmt, [
+                {"doc_id": doc_id, "delta": delta} for doc_id, delta in view_deltas.items()
+            ])
+        if download_deltas:
+            db.execute(_add_downloads_stmt, [
+                {"doc_id": doc_id, "delta": delta} for doc_id, delta in download_deltas.items()
+            ])
+        if view_logs:
+            db.execute(insert(DocumentView), view_logs)
+        if download_logs:
+            db.execute(insert(DocumentDownload), download_logs)
+
+    def _write_filtered(self, db, view_deltas, download_deltas, view_logs, download_logs) -> int:
+        """去掉已删除文档的数据、清空已删除用户的引用后重写，失败时丢弃整批"""
+        try:
+            doc_ids = set(view_deltas) | set(download_deltas)
+            user_ids = {log["user_id"] for log in view_logs + download_logs if log["user_id"] is not None}
+            existing_docs = set(db.scalars(select(Document.id).where(Document.id.in_(doc_ids)))) if doc_ids else set()
+            existing_users = set(db.scalars(select(User.id).where(User.id.in_(user_ids)))) if user_ids else set()
+
+            def keep_logs(logs):
+                kept = []
+                for log in logs:
+                    if log["document_id"] in existing_docs:
+                        if log["user_id"] not in existing_users:
+                            log = {**log, "user_id": None}
+                        kept.append(log)
+                return kept
+
+            view_logs, download_logs = keep_logs(view_logs), keep_logs(download_logs)
+            self._write(
+                db,
+                {doc_id: delta for doc_id, delta in view_deltas.items() if doc_id in existing_docs},
+                {doc_id: delta for doc_id, delta in download_deltas.items() if doc_id in existing_docs},
+                view_logs, download_logs
+            )
+            db.commit()
+            self._failed_flushes = 0
+            return len(view_logs) + len(download_logs)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"过滤后仍写入失败，丢弃本批文档计数数据: {e}")
+            return 0
+
+    def _requeue(self, view_deltas, download_deltas, view_logs, download_logs):
+        """写入失败时把数据放回缓冲区"""
+        with self.lock:
+            for doc_id, delta in view_deltas.items():
+                self.view_deltas[doc_id] += delta
+            for doc_id, delta in download_deltas.items():
+                self.download_deltas[doc_id] += delta
+            self.view_logs[:0] = view_logs
+            self.download_logs[:0] = download_logs
+
+    def _flush_loop(self):
+        """定期刷新循环，积压达到阈值时提前刷新"""
+        while not self._stop_event.is_set():
+            self._wake_event.wait(self.flush_interval)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                break
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"文档计数刷新异常: {e}")
+
+
+# 全局缓冲实例
+view_buffer = ViewCountBuffer()
+
+
+def get_view_buffer() -> ViewCountBuffer:
+    """获取计数缓冲实例"""
+    return view_buffer
+
+
+def start_view_buffer():
+    """启动计数缓冲"""
+    view_buffer.start()
+
+
+def stop_view_buffer():
+    """停止计数缓冲并写入剩余数据"""
+    view_buffer.stop()
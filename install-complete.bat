@@ -61,10 +61,10 @@ if errorlevel 1 (
     echo Package installation had some issues, trying manual installation...
     
     echo Installing core packages...
-    pip install fastapi uvicorn sqlalchemy python-dotenv pydantic aiofiles
+    pip install fastapi uvicorn sqlalchemy python-dotenv pydantic orjson aiofiles
     
     echo Installing auth packages...
-    pip install PyJWT python-jose[cryptography] passlib[bcrypt] python-multipart alembic pydantic-settings pydantic[email] email-validator
+    pip install PyJWT[crypto] passlib[bcrypt] python-multipart alembic pydantic-settings pydantic[email] email-validator
     
     echo Installing document processing...
     pip install pandas PyPDF2 python-docx openpyxl Pillow markdown pdfplumber